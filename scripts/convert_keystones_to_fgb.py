@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Keystones GeoJSON to FlatGeobuf Converter
+
+One-time conversion of data/keystones_with_boundaries.json into a FlatGeobuf
+file. The JSON has to be fully parsed on every run just to get at the
+geometries; FlatGeobuf stores them as binary with a packed R-tree, so readers
+can fetch bounds or a spatial subset without any per-feature JSON parsing.
+
+Only the id and name attributes are kept. Parks without geometry are skipped.
+
+ghsl_tiles_needed.py reads the output automatically when it is newer than the JSON.
+Re-run this after editing the JSON.
+
+Usage:
+    source .venv/bin/activate
+    python scripts/convert_keystones_to_fgb.py
+    python scripts/convert_keystones_to_fgb.py --out data/keystones.fgb
+"""
+
+import json
+import argparse
+import logging
+from pathlib import Path
+
+try:
+    import geopandas as gpd
+    import pyogrio
+    from shapely.geometry import shape
+except ImportError as e:
+    print(f"Missing: {e}. Run: pip install geopandas pyogrio shapely")
+    exit(1)
+
+# Configuration
+BASE_DIR = Path(__file__).parent.parent
+KEYSTONES_PATH = BASE_DIR / "data" / "keystones_with_boundaries.json"
+FGB_PATH = BASE_DIR / "data" / "keystones.fgb"
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def convert(keystones_path: Path, out_path: Path) -> int:
+    """Write keystones with geometry to FlatGeobuf, return number of parks written"""
+    with open(keystones_path) as f:
+        keystones = [p for p in json.load(f) if p.get('geometry')]
+
+    gdf = gpd.GeoDataFrame(
+        {'id': [p['id'] for p in keystones], 'name': [p.get('name') for p in keystones]},
+        geometry=[shape(p['geometry']) for p in keystones],
+        crs="EPSG:4326",
+    )
+    pyogrio.write_dataframe(gdf, out_path, driver="FlatGeobuf")
+
+    logger.info(f"Wrote {len(gdf)} parks to {out_path}")
+    return len(gdf)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert keystones GeoJSON to FlatGeobuf')
+    parser.add_argument('--keystones', default=str(KEYSTONES_PATH), help='Keystones JSON file')
+    parser.add_argument('--out', default=str(FGB_PATH), help='Output FlatGeobuf file')
+    args = parser.parse_args()
+
+    convert(Path(args.keystones), Path(args.out))
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -115,6 +115,10 @@ class OSMPlacesDownloader:
             CREATE INDEX IF NOT EXISTS idx_osm_places_location 
             ON osm_places(lat, lon)
         """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_osm_places_park_lat_lon 
+            ON osm_places(park_id, lat, lon)
+        """)
         
         # Create sync tracking table
         cursor.execute("""
@@ -7,11 +7,12 @@ population estimates, and stores settlement locations with GPS coordinates.
 
 Features:
 - Reads TIF files from ZIP without full extraction (memory efficient)
+- Reads only the park window from a Zarr copy when available (see ghsl_to_zarr.py)
 - Combines BUILT_S (built-up surface) with POP (population) data
 - Detects settlement clusters and estimates households
 - Uses local osm_places table for nearby place lookups (no API calls)
 - Calculates bearing/direction from nearest place
-- One tile at a time for memory efficiency
+- Tiles processed in parallel worker processes (--workers N; one tile at a time by default)
 
 Output format:
   "Building cluster 150m², ~16 people, 50 km north-northeast of Yalinga"
@@ -28,6 +29,7 @@ import zipfile
 import argparse
 import logging
 import math
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 import numpy as np
@@ -37,19 +39,28 @@ try:
     import rasterio
     from rasterio.mask import mask
     from rasterio.io import MemoryFile
-    from shapely.geometry import shape, Point, mapping
+    from rasterio.features import rasterize
+    from rasterio.crs import CRS
+    from rasterio.transform import Affine, array_bounds
+    from shapely.geometry import shape, mapping
     from shapely.ops import transform
     from scipy import ndimage
 except ImportError as e:
     print(f"Missing: {e}. Run: pip install pyproj rasterio shapely scipy")
     exit(1)
 
+try:
+    import zarr  # Optional: chunked tile store written by ghsl_to_zarr.py
+except ImportError:
+    zarr = None
+
 # Configuration
 BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "data"
 DB_PATH = BASE_DIR / "db.sqlite3"
 KEYSTONES_PATH = BASE_DIR / "data" / "keystones_with_boundaries.json"
 GHSL_ZIP_PATH = BASE_DIR / "data" / "ghsl_examples.zip"
+GHSL_ZARR_PATH = BASE_DIR / "data" / "ghsl.zarr"
 
 # GHSL grid parameters (Mollweide projection ESRI:54009)
 TILE_SIZE_M = 1000000  # 1000km tiles
@@ -61,6 +72,22 @@ MIN_BUILT_UP_M2 = 100  # Minimum m² to count as built-up
 MIN_CLUSTER_PIXELS = 3  # Minimum pixels for a settlement cluster
 HOUSEHOLD_SIZE = 5.2  # Average people per household in Africa
 BUILDING_SIZE_M2 = 50  # Average building footprint
+PARK_BUFFER_M = 10000  # Keep clusters within 10km of the park boundary
+
+# Settlement classification by built-up area, evaluated by SQLite
+SETTLEMENT_TYPE_SQL = """CASE
+    WHEN area_m2 < 200 THEN 'temporary'
+    WHEN area_m2 < 1000 THEN 'small'
+    WHEN area_m2 < 5000 THEN 'medium'
+    ELSE 'large'
+END"""
+
+# Quadkey zoom for park_settlements.quadkey (zoom 16 ≈ 600m cells at the equator)
+QUADKEY_ZOOM = 16
+MAX_MERCATOR_LAT = 85.05112878
+
+# Nearest-place lookup windows in degrees (0.5° ≈ 55km), tried in order
+PLACE_SEARCH_WINDOWS_DEG = (0.5, 1.0, 2.0)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -72,6 +99,7 @@ CARDINAL_DIRECTIONS = [
     "south", "south-southwest", "southwest", "west-southwest",
     "west", "west-northwest", "northwest", "north-northwest"
 ]
+CARDINAL_DIRECTIONS_ARR = np.array(CARDINAL_DIRECTIONS, dtype=object)
 
 
 def calculate_bearing(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -102,6 +130,12 @@ def bearing_to_cardinal(bearing: float) -> str:
     return CARDINAL_DIRECTIONS[index]
 
 
+def bearings_to_cardinal(bearings: np.ndarray) -> np.ndarray:
+    """Vectorized bearing_to_cardinal over an array of bearings (0-360)."""
+    index = ((np.asarray(bearings, dtype=np.float64) + 11.25) / 22.5).astype(np.int64) % 16
+    return CARDINAL_DIRECTIONS_ARR[index]
+
+
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """Calculate distance between two points in kilometers."""
     R = 6371  # Earth's radius in km
@@ -117,22 +151,66 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     return R * c
 
 
+def latlon_to_quadkey(lat: float, lon: float, zoom: int = QUADKEY_ZOOM) -> int:
+    """
+    Encode a point as an integer Web Mercator quadkey.
+    Bits are interleaved so nearby cells share a key prefix, which lets a
+    b-tree index on the column serve spatial range scans.
+    """
+    lat = max(min(lat, MAX_MERCATOR_LAT), -MAX_MERCATOR_LAT)
+    n = 1 << zoom
+    sin_lat = math.sin(math.radians(lat))
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * n)
+    x = min(max(x, 0), n - 1)
+    y = min(max(y, 0), n - 1)
+    
+    key = 0
+    for i in range(zoom - 1, -1, -1):
+        key = (key << 2) | (((y >> i) & 1) << 1) | ((x >> i) & 1)
+    return key
+
+
 def find_nearest_place(cursor, park_id: str, lat: float, lon: float) -> Optional[Dict]:
     """
     Find nearest place from osm_places table for a given park.
-    Returns dict with name, distance_km, and direction.
+    Returns dict with name, distance_km, and bearing (see bearings_to_cardinal).
     """
-    # Use squared distance approximation for sorting (faster than haversine for ordering)
-    cursor.execute('''
-        SELECT name, lat, lon, place_type,
-               (lat - ?) * (lat - ?) + (lon - ?) * (lon - ?) as dist_sq
-        FROM osm_places 
-        WHERE park_id = ?
-        ORDER BY dist_sq
-        LIMIT 1
-    ''', (lat, lat, lon, lon, park_id))
+    # Search a small lat/lon window first so the (park_id, lat, lon) index can be
+    # range-scanned, widening only when nothing is found nearby
+    row = None
+    for window_deg in PLACE_SEARCH_WINDOWS_DEG:
+        # Use squared distance approximation for sorting (faster than haversine for ordering)
+        cursor.execute('''
+            SELECT name, lat, lon, place_type,
+                   (lat - ?) * (lat - ?) + (lon - ?) * (lon - ?) as dist_sq
+            FROM osm_places 
+            WHERE park_id = ?
+              AND lat BETWEEN ? AND ?
+              AND lon BETWEEN ? AND ?
+            ORDER BY dist_sq
+            LIMIT 1
+        ''', (lat, lat, lon, lon, park_id,
+              lat - window_deg, lat + window_deg, lon - window_deg, lon + window_deg))
+        row = cursor.fetchone()
+        # Only trust hits within the inscribed circle; a closer place may sit
+        # just outside the window's corners otherwise
+        if row and row[4] <= window_deg * window_deg:
+            break
+        row = None
+    
+    if not row:
+        # Fall back to the whole park
+        cursor.execute('''
+            SELECT name, lat, lon, place_type,
+                   (lat - ?) * (lat - ?) + (lon - ?) * (lon - ?) as dist_sq
+            FROM osm_places 
+            WHERE park_id = ?
+            ORDER BY dist_sq
+            LIMIT 1
+        ''', (lat, lat, lon, lon, park_id))
+        row = cursor.fetchone()
     
-    row = cursor.fetchone()
     if not row:
         return None
     
@@ -144,23 +222,43 @@ def find_nearest_place(cursor, park_id: str, lat: float, lon: float) -> Optional
     # Calculate bearing FROM the place TO the settlement
     # (so we can say "X km north of PlaceName")
     bearing = calculate_bearing(place_lat, place_lon, lat, lon)
-    direction = bearing_to_cardinal(bearing)
     
     return {
         'name': place_name,
         'distance_km': distance_km,
-        'direction': direction,
+        'bearing': bearing,
         'place_type': place_type
     }
 
 
+# Per-process processor used by _process_tile
+_tile_worker: Optional['GHSLEnhancedProcessor'] = None
+
+
+def _process_tile(zip_path: Path, zarr_path: Optional[Path], park_moll, key: str,
+                  built_path: str, pop_path: Optional[str]) -> List[Dict]:
+    """Worker entry point: process one tile in a ProcessPoolExecutor worker"""
+    global _tile_worker
+    if _tile_worker is None or _tile_worker.zip_path != zip_path:
+        _tile_worker = GHSLEnhancedProcessor(zip_path, tile_worker=True, zarr_path=zarr_path)
+    return _tile_worker.process_tile(park_moll, key, built_path, pop_path)
+
+
 class GHSLEnhancedProcessor:
     """Process GHSL data to detect settlements with population estimates"""
     
-    def __init__(self, zip_path: Path = GHSL_ZIP_PATH):
+    def __init__(self, zip_path: Path = GHSL_ZIP_PATH, workers: int = 1, tile_worker: bool = False,
+                 zarr_path: Optional[Path] = GHSL_ZARR_PATH):
         self.zip_path = zip_path
+        # Prefer the chunked Zarr copy of the ZIP when it has been converted
+        self.zarr_path = zarr_path if zarr is not None and zarr_path and Path(zarr_path).exists() else None
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None  # Tile pool, shared by every park
         self.wgs84_to_moll = Transformer.from_crs("EPSG:4326", "ESRI:54009", always_xy=True)
         self.moll_to_wgs84 = Transformer.from_crs("ESRI:54009", "EPSG:4326", always_xy=True)
+        if tile_worker:
+            # Tile workers only read rasters; parks, index and DB stay in the parent
+            return
         self.keystones = self._load_keystones()
         self.tile_index = self._build_tile_index()
         self._init_db()
@@ -224,6 +322,7 @@ class GHSLEnhancedProcessor:
     def _init_db(self):
         """Create park_settlements table with required schema"""
         conn = sqlite3.connect(DB_PATH)
+        conn.execute("PRAGMA journal_mode=WAL")
         conn.execute("""CREATE TABLE IF NOT EXISTS park_settlements (
             id INTEGER PRIMARY KEY,
             park_id TEXT NOT NULL,
@@ -235,11 +334,30 @@ class GHSLEnhancedProcessor:
             nearest_place TEXT,
             distance_to_place_km REAL,
             direction_from_place TEXT,
-            settlement_type TEXT,
+            settlement_type TEXT GENERATED ALWAYS AS ({SETTLEMENT_TYPE_SQL}) VIRTUAL,
+            quadkey INTEGER,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )""")
+        )""".format(SETTLEMENT_TYPE_SQL=SETTLEMENT_TYPE_SQL))
+        # Older databases predate the quadkey column and the generated settlement_type
+        # (table_xinfo reports hidden=2/3 for generated columns)
+        columns = {row[1]: row[6] for row in conn.execute("PRAGMA table_xinfo(park_settlements)")}
+        if 'quadkey' not in columns:
+            conn.execute("ALTER TABLE park_settlements ADD COLUMN quadkey INTEGER")
+        if 'settlement_type' not in columns:
+            conn.execute(f"ALTER TABLE park_settlements ADD COLUMN settlement_type TEXT "
+                         f"GENERATED ALWAYS AS ({SETTLEMENT_TYPE_SQL}) VIRTUAL")
+        # Plain settlement_type columns get classified in SQL after each insert
+        self.settlement_type_stored = columns.get('settlement_type', 2) not in (2, 3)
         conn.execute("CREATE INDEX IF NOT EXISTS idx_settlements_park ON park_settlements(park_id)")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_settlements_location ON park_settlements(lat, lon)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_settlements_quadkey ON park_settlements(quadkey)")
+        # Composite index for windowed nearest-place lookups (osm_places is
+        # created by download_osm_places.py, which may not have run yet)
+        has_places = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='osm_places'"
+        ).fetchone()
+        if has_places:
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_osm_places_park_lat_lon ON osm_places(park_id, lat, lon)")
         conn.commit()
         conn.close()
         logger.info("Database table park_settlements initialized")
@@ -251,12 +369,16 @@ class GHSLEnhancedProcessor:
         row = int((GRID_ORIGIN_Y - y) / TILE_SIZE_M)
         return row, col
     
-    def get_tiles_for_park(self, park: Dict) -> List[str]:
+    def get_park_mollweide(self, park: Dict):
+        """Project a park's geometry to Mollweide (pyproj handles whole coordinate arrays)"""
+        return transform(self.wgs84_to_moll.transform, shape(park['geometry']))
+    
+    def get_tiles_for_park(self, park: Dict, park_moll=None) -> List[str]:
         """Get all tile keys that overlap with a park"""
         from shapely.geometry import box
         
-        geom = shape(park['geometry'])
-        park_moll = transform(lambda x, y: self.wgs84_to_moll.transform(x, y), geom)
+        if park_moll is None:
+            park_moll = self.get_park_mollweide(park)
         
         overlapping = []
         for key, bounds in self.tile_index.get('bounds', {}).items():
@@ -266,8 +388,50 @@ class GHSLEnhancedProcessor:
         
         return overlapping
     
-    def read_tif_from_zip(self, tif_path: str) -> Optional[Tuple[np.ndarray, dict]]:
-        """Read a TIF file from the ZIP into memory"""
+    def read_tif_from_zarr(self, tif_path: str, bounds: Optional[Tuple[float, float, float, float]] = None
+                           ) -> Optional[Tuple[np.ndarray, dict]]:
+        """
+        Read a tile from the Zarr store written by ghsl_to_zarr.py.
+        If bounds (Mollweide) are given, only the chunks covering them are read.
+        """
+        try:
+            z = zarr.open_array(str(Path(self.zarr_path) / tif_path), mode='r')
+        except Exception:
+            return None
+        
+        tile_transform = Affine(*z.attrs['transform'])
+        height, width = z.shape
+        row0, row1, col0, col1 = 0, height, 0, width
+        
+        if bounds is not None:
+            minx, miny, maxx, maxy = bounds
+            col0 = max(0, int(math.floor((minx - tile_transform.c) / tile_transform.a)))
+            col1 = min(width, int(math.ceil((maxx - tile_transform.c) / tile_transform.a)))
+            row0 = max(0, int(math.floor((maxy - tile_transform.f) / tile_transform.e)))
+            row1 = min(height, int(math.ceil((miny - tile_transform.f) / tile_transform.e)))
+            if col1 <= col0 or row1 <= row0:
+                return None
+        
+        arr = z[row0:row1, col0:col1]
+        window_transform = tile_transform * Affine.translation(col0, row0)
+        meta = {
+            'transform': window_transform,
+            'crs': CRS.from_wkt(z.attrs['crs']) if z.attrs.get('crs') else None,
+            'nodata': z.attrs.get('nodata'),
+            'width': arr.shape[1],
+            'height': arr.shape[0],
+            'bounds': array_bounds(arr.shape[0], arr.shape[1], window_transform)
+        }
+        return arr, meta
+    
+    def read_tif_from_zip(self, tif_path: str, bounds: Optional[Tuple[float, float, float, float]] = None
+                          ) -> Optional[Tuple[np.ndarray, dict]]:
+        """Read a TIF file from the ZIP into memory (or a window of it from the Zarr store)"""
+        if self.zarr_path is not None:
+            result = self.read_tif_from_zarr(tif_path, bounds)
+            if result is not None:
+                return result
+        
         try:
             with zipfile.ZipFile(self.zip_path, 'r') as zf:
                 with zf.open(tif_path) as f:
@@ -289,15 +453,12 @@ class GHSLEnhancedProcessor:
             logger.error(f"Failed to read {tif_path}: {e}")
             return None
     
-    def extract_park_data(self, park: Dict, built_arr: np.ndarray, built_meta: dict,
+    def extract_park_data(self, park_moll, built_arr: np.ndarray, built_meta: dict,
                           pop_arr: Optional[np.ndarray] = None, pop_meta: Optional[dict] = None
                          ) -> List[Dict]:
         """Extract settlement clusters for a park from raster data"""
         settlements = []
-        
-        # Get park geometry in Mollweide
-        park_geom = shape(park['geometry'])
-        park_moll = transform(lambda x, y: self.wgs84_to_moll.transform(x, y), park_geom)
+        xs, ys = [], []  # Mollweide centroids, converted to WGS84 in one batch
         
         # Get raster bounds
         left, bottom, right, top = built_meta['bounds']
@@ -319,56 +480,53 @@ class GHSLEnhancedProcessor:
         else:
             valid_mask = built_arr >= MIN_BUILT_UP_M2
         
+        # Rasterize park and buffer onto the tile grid so clusters outside the
+        # buffer are never labeled and in-park checks become array lookups
+        park_mask = rasterize([(park_moll, 1)], out_shape=built_arr.shape,
+                              transform=transform_matrix, dtype='uint8').astype(bool)
+        buffer_mask = rasterize([(park_moll.buffer(PARK_BUFFER_M), 1)], out_shape=built_arr.shape,
+                                transform=transform_matrix, dtype='uint8').astype(bool)
+        valid_mask &= buffer_mask
+        
         # Label connected components (settlement clusters)
         labeled, num_features = ndimage.label(valid_mask)
         
         if num_features == 0:
             return []
         
-        # Process each cluster
-        for cluster_id in range(1, num_features + 1):
-            cluster_mask = labeled == cluster_id
+        # Integrate population per cluster from the POP layer if available
+        cluster_pops = None
+        if pop_arr is not None and pop_meta is not None:
+            cluster_pops = self._sum_population_by_cluster(labeled, num_features, transform_matrix,
+                                                           pop_arr, pop_meta)
+        
+        # Process each cluster within its bounding box rather than rescanning the tile
+        for cluster_id, cluster_slice in enumerate(ndimage.find_objects(labeled), start=1):
+            if cluster_slice is None:
+                continue
+            cluster_mask = labeled[cluster_slice] == cluster_id
             pixel_count = np.sum(cluster_mask)
             
             if pixel_count < MIN_CLUSTER_PIXELS:
                 continue
             
-            # Get cluster centroid in pixel coordinates
+            # Get cluster centroid in pixel coordinates (offset by the slice origin)
             rows, cols = np.where(cluster_mask)
-            center_row = int(np.mean(rows))
-            center_col = int(np.mean(cols))
+            center_row = cluster_slice[0].start + int(np.mean(rows))
+            center_col = cluster_slice[1].start + int(np.mean(cols))
             
             # Convert to Mollweide coordinates
             x = left + center_col * transform_matrix.a
             y = top + center_row * transform_matrix.e  # e is negative
             
-            # Convert to WGS84
-            lon, lat = self.moll_to_wgs84.transform(x, y)
-            
-            # Check if centroid is in park (or buffer)
-            point_moll = Point(x, y)
-            in_park = park_moll.contains(point_moll)
-            in_buffer = park_moll.buffer(10000).contains(point_moll)  # 10km buffer
-            
-            if not in_buffer:
-                continue
+            # Check if centroid is in park (buffer already applied to valid_mask)
+            in_park = bool(park_mask[center_row, center_col])
             
             # Calculate area (sum of built-up m² in cluster)
-            area_m2 = float(np.sum(built_arr[cluster_mask]))
+            area_m2 = float(np.sum(built_arr[cluster_slice][cluster_mask]))
             
-            # Estimate population from POP layer if available
-            population = 0
-            if pop_arr is not None and pop_meta is not None:
-                # POP is at 100m, BUILT might be at 10m - need to handle resolution difference
-                # For simplicity, sample population at cluster centroid
-                pop_transform = pop_meta['transform']
-                pop_col = int((x - pop_meta['bounds'][0]) / pop_transform.a)
-                pop_row = int((pop_meta['bounds'][3] - y) / abs(pop_transform.e))
-                
-                if 0 <= pop_row < pop_arr.shape[0] and 0 <= pop_col < pop_arr.shape[1]:
-                    pop_val = pop_arr[pop_row, pop_col]
-                    if pop_val > 0 and pop_val != pop_meta.get('nodata'):
-                        population = float(pop_val) * pixel_count  # Scale by cluster size
+            # Population integrated over the cluster's POP cells
+            population = float(cluster_pops[cluster_id]) if cluster_pops is not None else 0
             
             # Fallback: estimate from building area
             if population <= 0:
@@ -377,28 +535,60 @@ class GHSLEnhancedProcessor:
             
             households = population / HOUSEHOLD_SIZE
             
-            # Classify settlement type by area
-            if area_m2 < 200:
-                settlement_type = 'temporary'
-            elif area_m2 < 1000:
-                settlement_type = 'small'
-            elif area_m2 < 5000:
-                settlement_type = 'medium'
-            else:
-                settlement_type = 'large'
-            
+            xs.append(x)
+            ys.append(y)
             settlements.append({
-                'lat': lat,
-                'lon': lon,
                 'area_m2': area_m2,
                 'population_est': int(round(population)),
                 'households_est': int(round(households)),
-                'settlement_type': settlement_type,
                 'in_park': in_park  # Track for filtering if needed
             })
         
+        # Convert all centroids to WGS84 with a single PROJ call, writing the
+        # result back into the (freshly built, owned) coordinate buffers
+        if settlements:
+            n = len(settlements)
+            lons = np.fromiter(xs, dtype=np.float64, count=n)
+            lats = np.fromiter(ys, dtype=np.float64, count=n)
+            self.moll_to_wgs84.transform(lons, lats, inplace=True)
+            for settlement, lon, lat in zip(settlements, lons, lats):
+                settlement['lat'] = float(lat)
+                settlement['lon'] = float(lon)
+        
         return settlements
     
+    def _sum_population_by_cluster(self, labeled: np.ndarray, num_features: int, built_transform,
+                                   pop_arr: np.ndarray, pop_meta: dict) -> np.ndarray:
+        """
+        Sum POP values per cluster label in one pass.
+        The label map is resampled (nearest neighbour) onto the POP grid by looking up
+        the built-up pixel under each POP cell centre, so a 10m BUILT_S tile and a
+        100m POP tile with different origins line up. Returns an array indexed by label.
+        """
+        pop_transform = pop_meta['transform']
+        pop_height, pop_width = pop_arr.shape
+        height, width = labeled.shape
+        
+        # Built-up pixel row/col under each POP cell centre
+        pop_xs = pop_transform.c + (np.arange(pop_width) + 0.5) * pop_transform.a
+        pop_ys = pop_transform.f + (np.arange(pop_height) + 0.5) * pop_transform.e
+        built_cols = np.floor((pop_xs - built_transform.c) / built_transform.a).astype(np.int64)
+        built_rows = np.floor((pop_ys - built_transform.f) / built_transform.e).astype(np.int64)
+        valid_cols = (built_cols >= 0) & (built_cols < width)
+        valid_rows = (built_rows >= 0) & (built_rows < height)
+        
+        labels_pop = np.zeros(pop_arr.shape, dtype=labeled.dtype)
+        labels_pop[np.ix_(valid_rows, valid_cols)] = labeled[np.ix_(built_rows[valid_rows],
+                                                                    built_cols[valid_cols])]
+        
+        pop_values = pop_arr.astype(np.float64)
+        nodata = pop_meta.get('nodata')
+        if nodata is not None:
+            pop_values[pop_arr == nodata] = 0
+        pop_values[pop_values < 0] = 0
+        
+        return ndimage.sum_labels(pop_values, labels_pop, index=np.arange(num_features + 1))
+    
     def _format_settlement_description(self, settlement: Dict) -> str:
         """Format settlement as human-readable description."""
         area = settlement.get('area_m2', 0)
@@ -414,17 +604,65 @@ class GHSLEnhancedProcessor:
         
         return desc
     
+    def process_tile(self, park_moll, key: str, built_path: str,
+                     pop_path: Optional[str] = None) -> List[Dict]:
+        """Read one tile's rasters from the ZIP and extract the park's settlements"""
+        # Window covering the park plus buffer (only used by the Zarr store)
+        minx, miny, maxx, maxy = park_moll.bounds
+        read_bounds = (minx - PARK_BUFFER_M, miny - PARK_BUFFER_M,
+                       maxx + PARK_BUFFER_M, maxy + PARK_BUFFER_M)
+        
+        # Read built-up data
+        logger.info(f"Reading tile {key} from {'Zarr' if self.zarr_path else 'ZIP'}...")
+        result = self.read_tif_from_zip(built_path, read_bounds)
+        if result is None:
+            return []
+        built_arr, built_meta = result
+        
+        # Try to get population data
+        pop_arr, pop_meta = None, None
+        if pop_path:
+            pop_result = self.read_tif_from_zip(pop_path, read_bounds)
+            if pop_result:
+                pop_arr, pop_meta = pop_result
+        
+        # Extract settlements
+        settlements = self.extract_park_data(park_moll, built_arr, built_meta, pop_arr, pop_meta)
+        
+        # Add tile info
+        parts = key.split('_')
+        tile_row = int(parts[0][1:]) if len(parts) >= 2 else None
+        tile_col = int(parts[1][1:]) if len(parts) >= 2 else None
+        for s in settlements:
+            s['tile_row'] = tile_row
+            s['tile_col'] = tile_col
+        
+        logger.info(f"Found {len(settlements)} settlements in tile {key}")
+        return settlements
+    
+    def _tile_pool(self) -> ProcessPoolExecutor:
+        """Worker pool for tile processing, started on first use and kept for the run"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+    
+    def close(self):
+        """Shut down the tile worker pool, if one was started"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+    
     def process_park(self, park: Dict, dry_run: bool = False) -> int:
         """Process a single park, return number of settlements found"""
         park_id = park['id']
         logger.info(f"Processing {park_id}...")
         
-        tile_keys = self.get_tiles_for_park(park)
-        all_settlements = []
+        # Project the park once; every tile reuses the Mollweide geometry
+        park_moll = self.get_park_mollweide(park)
         
-        for key in tile_keys:
-            
-            # Try to get built-up surface (prefer 100m for speed, fall back to 10m)
+        # Resolve raster paths per tile (prefer 100m for speed, fall back to 10m)
+        tile_jobs = []
+        for key in self.get_tiles_for_park(park, park_moll):
             built_path = self.tile_index['BUILT_S_100m'].get(key)
             if not built_path:
                 built_path = self.tile_index['BUILT_S_10m'].get(key)
@@ -433,38 +671,18 @@ class GHSLEnhancedProcessor:
                 logger.debug(f"No BUILT_S tile for {key}")
                 continue
             
-            # Read built-up data
-            logger.info(f"Reading tile {key} from ZIP...")
-            result = self.read_tif_from_zip(built_path)
-            if result is None:
-                continue
-            built_arr, built_meta = result
-            
-            # Try to get population data
-            pop_arr, pop_meta = None, None
-            pop_path = self.tile_index['POP_100m'].get(key)
-            if pop_path:
-                pop_result = self.read_tif_from_zip(pop_path)
-                if pop_result:
-                    pop_arr, pop_meta = pop_result
-            
-            # Extract settlements
-            settlements = self.extract_park_data(park, built_arr, built_meta, pop_arr, pop_meta)
-            
-            # Add tile info
-            parts = key.split('_')
-            tile_row = int(parts[0][1:]) if len(parts) >= 2 else None
-            tile_col = int(parts[1][1:]) if len(parts) >= 2 else None
-            for s in settlements:
-                s['tile_row'] = tile_row
-                s['tile_col'] = tile_col
-            
-            all_settlements.extend(settlements)
-            
-            # Clean up memory
-            del built_arr, pop_arr
-            
-            logger.info(f"Found {len(settlements)} settlements in tile {key}")
+            tile_jobs.append((key, built_path, self.tile_index['POP_100m'].get(key)))
+        
+        # Tiles are independent, so spread ZIP decompression and labeling across processes
+        all_settlements = []
+        if self.workers > 1 and len(tile_jobs) > 1:
+            executor = self._tile_pool()
+            futures = [executor.submit(_process_tile, self.zip_path, self.zarr_path, park_moll, *job) for job in tile_jobs]
+            for future in as_completed(futures):
+                all_settlements.extend(future.result())
+        else:
+            for job in tile_jobs:
+                all_settlements.extend(self.process_tile(park_moll, *job))
         
         if not all_settlements:
             logger.info(f"No settlements found for {park_id}")
@@ -472,15 +690,23 @@ class GHSLEnhancedProcessor:
         
         # Open database connection for both reading osm_places and writing settlements
         conn = sqlite3.connect(DB_PATH)
+        conn.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL, avoids fsync per commit
         cursor = conn.cursor()
         
         # Find nearest place for each settlement using local osm_places table
+        matched, bearings = [], []
         for s in all_settlements:
             place_info = find_nearest_place(cursor, park_id, s['lat'], s['lon'])
             if place_info:
                 s['nearest_place'] = place_info['name']
                 s['distance_to_place_km'] = place_info['distance_km']
-                s['direction_from_place'] = place_info['direction']
+                matched.append(s)
+                bearings.append(place_info['bearing'])
+        
+        # Convert all bearings to compass directions in one pass
+        if matched:
+            for s, direction in zip(matched, bearings_to_cardinal(bearings)):
+                s['direction_from_place'] = direction
         
         if dry_run:
             conn.close()
@@ -490,26 +716,27 @@ class GHSLEnhancedProcessor:
                 logger.info(f"  - {desc}")
             return len(all_settlements)
         
-        # Insert into database
-        inserted = 0
-        for s in all_settlements:
-            try:
-                cursor.execute("""
-                    INSERT INTO park_settlements 
-                    (park_id, lat, lon, area_m2, population_est, households_est,
-                     nearest_place, distance_to_place_km, direction_from_place, settlement_type)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    park_id, s['lat'], s['lon'], s['area_m2'],
-                    s['population_est'], s['households_est'],
-                    s.get('nearest_place'), s.get('distance_to_place_km'),
-                    s.get('direction_from_place'), s['settlement_type']
-                ))
-                inserted += 1
-            except sqlite3.IntegrityError:
-                pass
-        
-        conn.commit()
+        # Insert into database in a single transaction
+        rows = [
+            (park_id, s['lat'], s['lon'], s['area_m2'],
+             s['population_est'], s['households_est'],
+             s.get('nearest_place'), s.get('distance_to_place_km'),
+             s.get('direction_from_place'), latlon_to_quadkey(s['lat'], s['lon']))
+            for s in all_settlements
+        ]
+        with conn:
+            cursor.executemany("""
+                INSERT INTO park_settlements 
+                (park_id, lat, lon, area_m2, population_est, households_est,
+                 nearest_place, distance_to_place_km, direction_from_place, quadkey)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            if self.settlement_type_stored:
+                cursor.execute(f"""
+                    UPDATE park_settlements SET settlement_type = {SETTLEMENT_TYPE_SQL}
+                    WHERE park_id = ? AND settlement_type IS NULL
+                """, (park_id,))
+        inserted = len(rows)
         conn.close()
         
         logger.info(f"Inserted {inserted} settlements for {park_id}")
@@ -520,18 +747,21 @@ class GHSLEnhancedProcessor:
         total_settlements = 0
         parks_processed = 0
         
-        for i, park in enumerate(self.keystones):
-            if limit and i >= limit:
-                break
-            
-            try:
-                count = self.process_park(park, dry_run=dry_run)
-                total_settlements += count
-                parks_processed += 1
+        try:
+            for i, park in enumerate(self.keystones):
+                if limit and i >= limit:
+                    break
                 
-            except Exception as e:
-                logger.error(f"Error processing {park['id']}: {e}")
-                continue
+                try:
+                    count = self.process_park(park, dry_run=dry_run)
+                    total_settlements += count
+                    parks_processed += 1
+                    
+                except Exception as e:
+                    logger.error(f"Error processing {park['id']}: {e}")
+                    continue
+        finally:
+            self.close()
         
         logger.info(f"Completed: {parks_processed} parks, {total_settlements} settlements")
         return total_settlements
@@ -543,9 +773,13 @@ def main():
     parser.add_argument('--dry-run', action='store_true', help='Show what would be done')
     parser.add_argument('--limit', type=int, help='Limit number of parks to process')
     parser.add_argument('--zip', default=str(GHSL_ZIP_PATH), help='Path to GHSL ZIP file')
+    parser.add_argument('--zarr', default=str(GHSL_ZARR_PATH),
+                        help='Zarr store from ghsl_to_zarr.py (used when present)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes for per-tile processing (default: 1)')
     args = parser.parse_args()
     
-    processor = GHSLEnhancedProcessor(Path(args.zip))
+    processor = GHSLEnhancedProcessor(Path(args.zip), workers=args.workers, zarr_path=Path(args.zarr))
     
     if args.park:
         # Find specific park
@@ -553,7 +787,10 @@ def main():
         if not park:
             logger.error(f"Park not found: {args.park}")
             return 1
-        processor.process_park(park, dry_run=args.dry_run)
+        try:
+            processor.process_park(park, dry_run=args.dry_run)
+        finally:
+            processor.close()
     else:
         processor.process_all_parks(dry_run=args.dry_run, limit=args.limit)
     
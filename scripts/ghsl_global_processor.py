@@ -10,6 +10,8 @@ Features:
 - Processes all 162 parks from a single global file
 - Checkpointing: skips already-processed parks
 - Progress logging for overnight runs
+- Parks processed in parallel worker processes (--workers)
+- Huge parks read in row strips, keeping only their built-up mask in memory
 
 Usage:
     nohup python scripts/ghsl_global_processor.py > logs/ghsl_global.log 2>&1 &
@@ -23,9 +25,11 @@ import math
 import time
 import sys
 import os
+import pickle
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
 import numpy as np
 
 sys.stdout = os.fdopen(sys.stdout.fileno(), 'w', buffering=1)
@@ -33,18 +37,24 @@ sys.stdout = os.fdopen(sys.stdout.fileno(), 'w', buffering=1)
 try:
     from pyproj import Transformer
     import rasterio
-    from rasterio.windows import from_bounds, Window
+    from rasterio.windows import Window
     from shapely.geometry import shape
-    from shapely.ops import transform as shp_transform
     from scipy import ndimage
+    from scipy.spatial import cKDTree
 except ImportError as e:
     print(f"Missing: {e}. Run: pip install pyproj rasterio shapely scipy")
     sys.exit(1)
 
+try:
+    from numba import njit  # Optional: JIT cluster extraction for small windows
+except ImportError:
+    njit = None
+
 # Paths
 BASE_DIR = Path(__file__).parent.parent
 DB_PATH = BASE_DIR / "db.sqlite3"
 KEYSTONES_PATH = BASE_DIR / "data" / "keystones_with_boundaries.json"
+OSM_TREE_CACHE_DIR = BASE_DIR / "data" / "osm_trees"
 GHSL_GLOBAL_PATH = BASE_DIR / "data" / "ghsl_global" / "GHS_BUILT_S_E2030_GLOBE_R2023A_54009_100_V1_0.tif"
 
 # Detection parameters
@@ -52,6 +62,19 @@ MIN_BUILT_UP_M2 = 500  # m² threshold
 MIN_CLUSTER_PIXELS = 5
 HOUSEHOLD_SIZE = 5.2
 PIXEL_SIZE_M = 100
+NUMBA_MAX_PIXELS = 4_000_000  # Larger windows use scipy.ndimage labeling
+
+# Park windows larger than this many pixels are read in row strips of about this
+# size, each thresholded straight into the built-up mask. Detection always runs on
+# full-resolution pixels: a decimated read averages small built-up spots below
+# MIN_BUILT_UP_M2.
+WINDOW_STRIP_PIXELS = 50_000_000
+
+# GDAL tuning for windowed reads: a larger block cache helps neighbouring parks
+# that share raster blocks, and compressed blocks are decoded on all cores.
+# Both are totals, split evenly between worker processes.
+GDAL_CACHEMAX_MB = 1024
+GDAL_NUM_THREADS = 'ALL_CPUS'
 
 # Transformers
 wgs84_to_moll = Transformer.from_crs("EPSG:4326", "ESRI:54009", always_xy=True)
@@ -81,29 +104,162 @@ def haversine_km(lat1, lon1, lat2, lon2) -> float:
     a = math.sin(dlat/2)**2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon/2)**2
     return R * 2 * math.asin(math.sqrt(a))
 
+# Vectorized variants of the helpers above, for whole batches of settlements
+CARDINALS_ARR = np.array(CARDINALS, dtype=object)
+
+def bearing_to_cardinal_vec(bearings: np.ndarray) -> np.ndarray:
+    idx = np.digitize((bearings + 11.25) % 360, np.arange(22.5, 360, 22.5))
+    return CARDINALS_ARR[idx]
+
+def calc_bearing_vec(lat1, lon1, lat2, lon2) -> np.ndarray:
+    lat1_r, lat2_r = np.radians(lat1), np.radians(lat2)
+    dlon = np.radians(np.asarray(lon2) - lon1)
+    x = np.sin(dlon) * np.cos(lat2_r)
+    y = np.cos(lat1_r) * np.sin(lat2_r) - np.sin(lat1_r) * np.cos(lat2_r) * np.cos(dlon)
+    return (np.degrees(np.arctan2(x, y)) + 360) % 360
+
+def haversine_km_vec(lat1, lon1, lat2, lon2) -> np.ndarray:
+    R = 6371
+    dlat = np.radians(np.asarray(lat2) - lat1)
+    dlon = np.radians(np.asarray(lon2) - lon1)
+    a = np.sin(dlat/2)**2 + np.cos(np.radians(lat1)) * np.cos(np.radians(lat2)) * np.sin(dlon/2)**2
+    return R * 2 * np.arcsin(np.sqrt(a))
+
+
+def _built_up_threshold(dtype: str):
+    """
+    MIN_BUILT_UP_M2 (value in m² per pixel), typed to the raster's integer dtype
+    so the compare runs without upcasting the window
+    """
+    dtype = np.dtype(dtype)
+    if np.issubdtype(dtype, np.integer):
+        info = np.iinfo(dtype)
+        if info.min <= MIN_BUILT_UP_M2 <= info.max:
+            return dtype.type(MIN_BUILT_UP_M2)
+    return MIN_BUILT_UP_M2
+
+
+def _cluster_stats_scipy(binary: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Pixel counts and centroid rows/cols of clusters with >= MIN_CLUSTER_PIXELS"""
+    # Label connected components
+    labeled = np.empty(binary.shape, dtype=np.int32)
+    num_features = ndimage.label(binary, output=labeled)
+    
+    # Cluster sizes from one histogram pass over the labels (index 0 is background)
+    sizes = np.bincount(labeled.ravel(), minlength=num_features + 1)
+    keep = np.nonzero(sizes >= MIN_CLUSTER_PIXELS)[0]
+    keep = keep[keep > 0]
+    if len(keep) == 0:
+        empty = np.empty(0)
+        return empty, empty, empty
+    
+    # Centroids as per-label means of the pixel coordinates; ogrid grids are broadcast
+    # against the labels, so no full-size coordinate or per-cluster mask is allocated
+    rows_grid, cols_grid = np.ogrid[:binary.shape[0], :binary.shape[1]]
+    centroid_rows = np.asarray(ndimage.mean(rows_grid, labeled, index=keep))
+    centroid_cols = np.asarray(ndimage.mean(cols_grid, labeled, index=keep))
+    return sizes[keep], centroid_rows, centroid_cols
+
+if njit is not None:
+    @njit(cache=True)
+    def _find_root(parent, x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    @njit(cache=True)
+    def _cluster_stats_numba(binary):
+        """
+        Single-pass union-find labeling (4-connectivity, like ndimage.label)
+        that accumulates pixel counts and row/col sums per cluster root.
+        Returns (counts, row_sums, col_sums) indexed by root label; non-roots are 0.
+        """
+        h, w = binary.shape
+        labels = np.zeros((h, w), dtype=np.int32)
+        parent = np.zeros(h * w // 2 + 2, dtype=np.int32)
+        next_label = 1
+        
+        for r in range(h):
+            for c in range(w):
+                if not binary[r, c]:
+                    continue
+                up = labels[r - 1, c] if r > 0 else 0
+                left = labels[r, c - 1] if c > 0 else 0
+                if up == 0 and left == 0:
+                    parent[next_label] = next_label
+                    labels[r, c] = next_label
+                    next_label += 1
+                elif up != 0 and left != 0:
+                    ru = _find_root(parent, up)
+                    rl = _find_root(parent, left)
+                    if ru < rl:
+                        parent[rl] = ru
+                        labels[r, c] = ru
+                    else:
+                        parent[ru] = rl
+                        labels[r, c] = rl
+                else:
+                    labels[r, c] = up if up != 0 else left
+        
+        counts = np.zeros(next_label, dtype=np.int64)
+        row_sums = np.zeros(next_label, dtype=np.float64)
+        col_sums = np.zeros(next_label, dtype=np.float64)
+        for r in range(h):
+            for c in range(w):
+                label = labels[r, c]
+                if label != 0:
+                    root = _find_root(parent, label)
+                    counts[root] += 1
+                    row_sums[root] += r
+                    col_sums[root] += c
+        return counts, row_sums, col_sums
+
 
 class GHSLGlobalProcessor:
-    def __init__(self, ghsl_path: Path = GHSL_GLOBAL_PATH):
+    def __init__(self, ghsl_path: Path = GHSL_GLOBAL_PATH, workers: int = 1, worker: bool = False):
         self.ghsl_path = ghsl_path
-        self.keystones = self._load_keystones()
-        self._init_db()
+        # Pool workers are handed their parks, and the parent has already set up the table
+        self.keystones = [] if worker else self._load_keystones()
+        
+        # One connection for the life of the processor
+        self.conn = sqlite3.connect(DB_PATH, timeout=60)  # Parallel workers share the DB
+        if not worker:
+            self._init_db()
+        self.processed_parks: Optional[set] = None  # Loaded on first use
+        self._trees: Dict[str, Optional[tuple]] = {}  # park_id -> (KD-tree, names, coords)
         
         # Open raster once, keep handle
         if not ghsl_path.exists():
             raise FileNotFoundError(f"GHSL file not found: {ghsl_path}")
+        # One of `workers` processors reading at once: take a share of the GDAL budget
+        if workers > 1:
+            cache_mb = max(64, GDAL_CACHEMAX_MB // workers)
+            num_threads = str(max(1, (os.cpu_count() or 1) // workers))
+        else:
+            cache_mb, num_threads = GDAL_CACHEMAX_MB, GDAL_NUM_THREADS
+        self._env = rasterio.Env(GDAL_CACHEMAX=cache_mb, GDAL_NUM_THREADS=num_threads)
+        self._env.__enter__()
         self.src = rasterio.open(ghsl_path)
+        self._inv = ~self.src.transform  # Mollweide -> pixel, inverted once
         log(f"Opened GHSL: {self.src.width}x{self.src.height}, CRS={self.src.crs}")
         
     def __del__(self):
         if hasattr(self, 'src') and self.src:
             self.src.close()
+        if hasattr(self, 'conn') and self.conn:
+            self.conn.close()
+        if hasattr(self, '_env') and self._env:
+            self._env.__exit__(None, None, None)
     
     def _load_keystones(self) -> List[Dict]:
         with open(KEYSTONES_PATH) as f:
             return [p for p in json.load(f) if p.get('geometry')]
     
     def _init_db(self):
-        conn = sqlite3.connect(DB_PATH)
+        conn = self.conn
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
         conn.execute('''
             CREATE TABLE IF NOT EXISTS park_settlements (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -121,35 +277,66 @@ class GHSLGlobalProcessor:
         ''')
         conn.execute('CREATE INDEX IF NOT EXISTS idx_settlements_park ON park_settlements(park_id)')
         conn.commit()
-        conn.close()
     
-    def _find_nearest_place(self, lat: float, lon: float, park_id: str) -> Optional[tuple]:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT name, lat, lon, place_type
-            FROM osm_places
-            WHERE park_id = ?
-            ORDER BY (lat - ?)*(lat - ?) + (lon - ?)*(lon - ?)
-            LIMIT 1
-        ''', (park_id, lat, lat, lon, lon))
-        row = cursor.fetchone()
-        conn.close()
+    def _load_processed_parks(self) -> set:
+        """Park IDs that already have settlements, fetched in a single query"""
+        return {r[0] for r in self.conn.execute('SELECT DISTINCT park_id FROM park_settlements')}
+    
+    def _load_places(self, park_id: str) -> Optional[tuple]:
+        """
+        Load a park's osm_places once and index them in a KD-tree (lat/lon degrees).
+        Trees are kept in memory for the run and pickled to OSM_TREE_CACHE_DIR,
+        keyed by the park's osm_places_sync entry so a re-download invalidates them.
+        """
+        if park_id in self._trees:
+            return self._trees[park_id]
         
-        if row:
-            name, place_lat, place_lon, place_type = row
-            dist = haversine_km(lat, lon, place_lat, place_lon)
-            bearing = calc_bearing(place_lat, place_lon, lat, lon)
-            direction = bearing_to_cardinal(bearing)
-            return (name, dist, direction)
-        return None
+        try:
+            sync = self.conn.execute(
+                'SELECT last_sync, place_count FROM osm_places_sync WHERE park_id = ?', (park_id,)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            sync = None  # Sync table not created yet
+        
+        cache_path = OSM_TREE_CACHE_DIR / f"{park_id}.pkl"
+        if sync and cache_path.exists():
+            try:
+                with open(cache_path, 'rb') as f:
+                    cached = pickle.load(f)
+                if cached['sync'] == tuple(sync):
+                    self._trees[park_id] = cached['places']
+                    return cached['places']
+            except Exception:
+                pass  # Stale or unreadable cache, rebuild below
+        
+        rows = self.conn.execute(
+            'SELECT name, lat, lon FROM osm_places WHERE park_id = ?', (park_id,)
+        ).fetchall()
+        
+        places = None
+        if rows:
+            names = [r[0] for r in rows]
+            coords = np.array([(r[1], r[2]) for r in rows], dtype=np.float64)
+            places = (cKDTree(coords), names, coords)
+        
+        self._trees[park_id] = places
+        if sync:
+            OSM_TREE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            with open(cache_path, 'wb') as f:
+                pickle.dump({'sync': tuple(sync), 'places': places}, f)
+        return places
     
     def _read_park_window(self, park: Dict) -> Optional[tuple]:
         """Read GHSL data for a park using windowed read"""
         try:
-            geom = shape(park['geometry'])
-            geom_moll = shp_transform(lambda x, y: wgs84_to_moll.transform(x, y), geom)
-            minx, miny, maxx, maxy = geom_moll.bounds
+            # Only the Mollweide bounds are needed, so reproject the WGS84 bbox corners
+            # instead of every vertex. Mollweide x shrinks away from the equator, so
+            # the widest point of a bbox spanning it lies on the equator, not a corner.
+            lon_min, lat_min, lon_max, lat_max = shape(park['geometry']).bounds
+            lats = [lat_min, lat_max] + ([0.0] if lat_min < 0 < lat_max else [])
+            lons = np.repeat([lon_min, lon_max], len(lats))
+            mxs, mys = wgs84_to_moll.transform(lons, np.tile(lats, 2))
+            minx, miny, maxx, maxy = mxs.min(), mys.min(), mxs.max(), mys.max()
             
             # Add small buffer
             buffer = 1000  # 1km
@@ -158,90 +345,84 @@ class GHSLGlobalProcessor:
             maxx += buffer
             maxy += buffer
             
-            # Create window from bounds
-            window = from_bounds(minx, miny, maxx, maxy, self.src.transform)
+            # Bounds to pixel coordinates with the precomputed inverse, clamped to the raster
+            col0, row0 = self._inv * (minx, maxy)
+            col1, row1 = self._inv * (maxx, miny)
+            col0, row0 = max(0, math.floor(col0)), max(0, math.floor(row0))
+            col1, row1 = min(self.src.width, math.ceil(col1)), min(self.src.height, math.ceil(row1))
             
-            # Clamp to raster bounds
-            window = Window(
-                max(0, int(window.col_off)),
-                max(0, int(window.row_off)),
-                min(int(window.width), self.src.width - max(0, int(window.col_off))),
-                min(int(window.height), self.src.height - max(0, int(window.row_off)))
-            )
-            
-            if window.width <= 0 or window.height <= 0:
+            if col1 <= col0 or row1 <= row0:
                 return None
+            window = Window(col0, row0, col1 - col0, row1 - row0)
             
-            # Read windowed data
-            arr = self.src.read(1, window=window)
-            win_transform = self.src.window_transform(window)
+            # Read windowed data, thresholded to the built-up mask strip by strip;
+            # wilderness strips are dropped after one reduction, no mask allocated
+            threshold = _built_up_threshold(self.src.dtypes[0])
+            strip_rows = max(1, WINDOW_STRIP_PIXELS // window.width)
+            built = None
+            for r in range(0, window.height, strip_rows):
+                n = min(strip_rows, window.height - r)
+                arr = self.src.read(1, window=Window(col0, row0 + r, window.width, n))
+                if arr.size == 0 or arr.max() <= threshold:
+                    continue
+                if built is None:
+                    built = np.zeros((window.height, window.width), dtype=bool)
+                np.greater(arr, threshold, out=built[r:r + n])
             
-            return arr, win_transform, (minx, miny, maxx, maxy)
+            if built is None:
+                return None  # No built-up pixels in the park
+            return built, self.src.window_transform(window), (minx, miny, maxx, maxy)
         except Exception as e:
             log(f"  Error reading window: {e}")
             return None
     
-    def _extract_settlements(self, park: Dict, arr: np.ndarray, transform, bounds: tuple) -> List[Dict]:
-        """Extract settlement clusters from array"""
-        if arr is None or arr.size == 0:
-            return []
+    def _extract_settlements(self, park: Dict, binary: np.ndarray, transform, bounds: tuple) -> List[np.ndarray]:
+        """
+        Extract settlement clusters from the window's built-up mask (bool: half the
+        memory of uint8 and scipy's fast label path) as parallel arrays
+        [lats, lons, areas_m2, populations]
+        """
+        # Parks are mostly wilderness: label only the bounding box of built-up pixels
+        built_rows = np.flatnonzero(binary.any(axis=1))
+        built_cols = np.flatnonzero(binary.any(axis=0))
+        row0, col0 = built_rows[0], built_cols[0]
+        binary = binary[row0:built_rows[-1] + 1, col0:built_cols[-1] + 1]
         
-        # Threshold for built-up (value in m² per pixel)
-        threshold = MIN_BUILT_UP_M2
-        binary = (arr > threshold).astype(np.uint8)
+        # Cluster pixel counts and centroids (crop coordinates); small windows go
+        # through the JIT kernel to skip SciPy's per-call overhead
+        if njit is not None and binary.size <= NUMBA_MAX_PIXELS:
+            counts, row_sums, col_sums = _cluster_stats_numba(binary)
+            keep = np.nonzero(counts >= MIN_CLUSTER_PIXELS)[0]
+            pixel_counts = counts[keep]
+            centroid_rows = row_sums[keep] / pixel_counts
+            centroid_cols = col_sums[keep] / pixel_counts
+        else:
+            pixel_counts, centroid_rows, centroid_cols = _cluster_stats_scipy(binary)
         
-        if binary.sum() == 0:
+        if len(pixel_counts) == 0:
             return []
         
-        # Label connected components
-        labeled, num_features = ndimage.label(binary)
+        # Centroids to Mollweide (offset from the crop back to the window)
+        xs = transform.c + (col0 + centroid_cols) * transform.a
+        ys = transform.f + (row0 + centroid_rows) * transform.e
+        areas = pixel_counts * PIXEL_SIZE_M * PIXEL_SIZE_M
         
-        settlements = []
+        # Convert all centroids to WGS84 in one PROJ call
+        lons, lats = moll_to_wgs84.transform(xs, ys)
         
-        for cluster_id in range(1, min(num_features + 1, 1000)):
-            mask = labeled == cluster_id
-            pixel_count = mask.sum()
-            
-            if pixel_count < MIN_CLUSTER_PIXELS:
-                continue
-            
-            # Calculate centroid
-            rows, cols = np.where(mask)
-            center_row = rows.mean()
-            center_col = cols.mean()
-            
-            # Convert to Mollweide
-            x = transform.c + center_col * transform.a
-            y = transform.f + center_row * transform.e
-            
-            # Convert to WGS84
-            lon, lat = moll_to_wgs84.transform(x, y)
-            
-            # Area and population
-            area_m2 = pixel_count * PIXEL_SIZE_M * PIXEL_SIZE_M
-            buildings = area_m2 / 50
-            pop_estimate = buildings * HOUSEHOLD_SIZE
-            
-            settlements.append({
-                'lat': round(lat, 6),
-                'lon': round(lon, 6),
-                'area_m2': round(area_m2, 1),
-                'population_estimate': round(pop_estimate, 0)
-            })
-        
-        return settlements
+        # Population: ~50m² per building
+        pops = areas / 50 * HOUSEHOLD_SIZE
+        
+        return [np.round(lats, 6), np.round(lons, 6), np.round(areas, 1), np.round(pops, 0)]
     
     def process_park(self, park: Dict, dry_run: bool = False) -> int:
         park_id = park['id']
         
         # Check if already processed
         if not dry_run:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute('SELECT COUNT(*) FROM park_settlements WHERE park_id = ?', (park_id,))
-            existing = cursor.fetchone()[0]
-            conn.close()
-            if existing > 0:
+            if self.processed_parks is None:
+                self.processed_parks = self._load_processed_parks()
+            if park_id in self.processed_parks:
                 return -1  # Already processed
         
         # Read park window
@@ -249,52 +430,59 @@ class GHSLGlobalProcessor:
         if result is None:
             return 0
         
-        arr, transform, bounds = result
+        built, transform, bounds = result
         
         # Extract settlements
-        settlements = self._extract_settlements(park, arr, transform, bounds)
+        settlements = self._extract_settlements(park, built, transform, bounds)
         
         if not settlements:
             return 0
         
-        # Add place context
-        for s in settlements:
-            place_info = self._find_nearest_place(s['lat'], s['lon'], park_id)
-            if place_info:
-                name, dist, direction = place_info
-                s['nearest_place'] = name
-                s['distance_km'] = round(dist, 1)
-                s['direction'] = direction
-                s['description'] = f"{s['area_m2']:.0f}m², ~{s['population_estimate']:.0f} people, {dist:.0f}km {direction} of {name}"
-            else:
-                s['description'] = f"{s['area_m2']:.0f}m², ~{s['population_estimate']:.0f} people at ({s['lat']:.4f}, {s['lon']:.4f})"
+        # Python floats for SQLite; the arrays stay parallel from here on
+        lats, lons, areas, pops = (a.tolist() for a in settlements)
+        k = len(lats)
         
-        if dry_run:
-            log(f"  Would insert {len(settlements)} settlements")
-            for s in settlements[:3]:
-                log(f"    - {s['description']}")
-            return len(settlements)
+        # Add place context: one KD-tree query matches every settlement to its nearest place
+        places = self._load_places(park_id)
+        if places is not None:
+            tree, names, coords = places
+            pts = np.column_stack(settlements[:2])
+            _, idx = tree.query(pts, k=1)
+            place_lats, place_lons = coords[idx, 0], coords[idx, 1]
+            
+            # Distances and directions for the whole batch in a few ufunc passes
+            dists = haversine_km_vec(pts[:, 0], pts[:, 1], place_lats, place_lons)
+            directions = bearing_to_cardinal_vec(calc_bearing_vec(place_lats, place_lons, pts[:, 0], pts[:, 1])).tolist()
+            nearest = [names[i] for i in idx]
+            descriptions = [f"{a:.0f}m², ~{p:.0f} people, {d:.0f}km {dir_} of {n}"
+                            for a, p, d, dir_, n in zip(areas, pops, dists, directions, nearest)]
+            dists = np.round(dists, 1).tolist()
+        else:
+            nearest = dists = directions = [None] * k
+            descriptions = [f"{a:.0f}m², ~{p:.0f} people at ({lat:.4f}, {lon:.4f})"
+                            for a, p, lat, lon in zip(areas, pops, lats, lons)]
         
-        # Save to database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        if dry_run:
+            log(f"  Would insert {k} settlements")
+            for description in descriptions[:3]:
+                log(f"    - {description}")
+            return k
         
-        for s in settlements:
-            cursor.execute('''
+        # Save to database in a single transaction
+        rows = list(zip([park_id] * k, lats, lons, areas, pops, nearest, dists, directions, descriptions))
+        with self.conn:
+            self.conn.executemany('''
                 INSERT INTO park_settlements 
                 (park_id, lat, lon, area_m2, population_estimate, nearest_place, distance_km, direction, description)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                park_id, s['lat'], s['lon'], s['area_m2'], s['population_estimate'],
-                s.get('nearest_place'), s.get('distance_km'), s.get('direction'), s['description']
-            ))
+            ''', rows)
+        if self.processed_parks is not None:
+            self.processed_parks.add(park_id)
         
-        conn.commit()
-        conn.close()
-        
-        return len(settlements)
+        return k
     
-    def process_all(self, dry_run: bool = False, limit: int = None, park_id: str = None):
+    def process_all(self, dry_run: bool = False, limit: int = None, park_id: str = None,
+                    workers: int = 1):
         log(f"GHSL Global Processor")
         log(f"Processing from: {self.ghsl_path}")
         
@@ -304,17 +492,30 @@ class GHSLGlobalProcessor:
         if limit:
             parks = parks[:limit]
         
-        log(f"Processing {len(parks)} parks...")
+        log(f"Processing {len(parks)} parks with {workers} worker(s)...")
+        self.processed_parks = self._load_processed_parks()
         
         total_settlements = 0
         processed = 0
         skipped = 0
         errors = 0
         
-        for i, park in enumerate(parks, 1):
-            try:
-                count = self.process_park(park, dry_run)
-                if count == -1:
+        if workers > 1 and len(parks) > 1:
+            # Parks are independent windows of the raster; each worker opens its own
+            # raster handle and DB connection (neither is safe to share across processes)
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                           initargs=(self.ghsl_path, workers))
+            results = executor.map(_process_one, parks, [dry_run] * len(parks))
+        else:
+            executor = None
+            results = (_run_park(self, park, dry_run) for park in parks)
+        
+        try:
+            for i, (park, (count, error)) in enumerate(zip(parks, results), 1):
+                if error is not None:
+                    log(f"[{i}/{len(parks)}] {park['id']}: ERROR - {error}")
+                    errors += 1
+                elif count == -1:
                     skipped += 1
                     log(f"[{i}/{len(parks)}] {park['id']}: already processed, skipping")
                 elif count == 0:
@@ -324,21 +525,41 @@ class GHSLGlobalProcessor:
                     log(f"[{i}/{len(parks)}] {park['id']}: {count} settlements")
                     total_settlements += count
                     processed += 1
-            except Exception as e:
-                log(f"[{i}/{len(parks)}] {park['id']}: ERROR - {e}")
-                errors += 1
+        finally:
+            if executor is not None:
+                executor.shutdown()
         
         log(f"\nComplete: {processed} processed, {skipped} skipped, {errors} errors")
         log(f"Total settlements: {total_settlements}")
         return total_settlements
 
 
+# Per-process processor for ProcessPoolExecutor workers
+_worker: Optional[GHSLGlobalProcessor] = None
+
+def _init_worker(ghsl_path: Path, workers: int):
+    global _worker
+    _worker = GHSLGlobalProcessor(ghsl_path, workers, worker=True)
+
+def _run_park(processor: GHSLGlobalProcessor, park: Dict, dry_run: bool) -> Tuple[Optional[int], Optional[str]]:
+    """Process one park, returning (count, None) or (None, error message)"""
+    try:
+        return processor.process_park(park, dry_run), None
+    except Exception as e:
+        return None, str(e)
+
+def _process_one(park: Dict, dry_run: bool) -> Tuple[Optional[int], Optional[str]]:
+    return _run_park(_worker, park, dry_run)
+
+
 def main():
     parser = argparse.ArgumentParser(description='GHSL Global Processor')
     parser.add_argument('--park', help='Process single park by ID')
     parser.add_argument('--dry-run', action='store_true', help='Show what would be done')
     parser.add_argument('--limit', type=int, help='Limit number of parks')
     parser.add_argument('--clear', action='store_true', help='Clear existing data first')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Parks processed in parallel (default: 1)')
     args = parser.parse_args()
     
     if args.clear:
@@ -349,7 +570,8 @@ def main():
         conn.close()
     
     processor = GHSLGlobalProcessor()
-    processor.process_all(dry_run=args.dry_run, limit=args.limit, park_id=args.park)
+    processor.process_all(dry_run=args.dry_run, limit=args.limit, park_id=args.park,
+                          workers=args.workers)
 
 
 if __name__ == '__main__':
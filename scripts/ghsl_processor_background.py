@@ -6,7 +6,7 @@ Designed to run safely overnight for all parks.
 
 Key features:
 - Windowed reads instead of mask operations (memory efficient)
-- Processes one tile at a time
+- Processes one tile at a time, optionally several parks at once (--workers)
 - Checkpointing: skips already-processed parks
 - Progress logging to file
 - Graceful error handling per park
@@ -19,8 +19,12 @@ Usage:
     
     # Dry run:
     python scripts/ghsl_processor_background.py --dry-run --limit 5
+    
+    # Process parks in parallel (default: one worker):
+    python scripts/ghsl_processor_background.py --workers 4
 """
 
+import re
 import json
 import sqlite3
 import zipfile
@@ -31,6 +35,8 @@ import sys
 import os
 from pathlib import Path
 from datetime import datetime
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Tuple, Optional
 import numpy as np
 
@@ -41,25 +47,50 @@ try:
     from pyproj import Transformer
     import rasterio
     from rasterio.windows import from_bounds, Window
-    from rasterio.io import MemoryFile
     from shapely.geometry import shape, box
     from shapely.ops import transform as shp_transform
+    from shapely.strtree import STRtree
+    from shapely.prepared import prep
     from scipy import ndimage
 except ImportError as e:
     print(f"Missing: {e}. Run: pip install pyproj rasterio shapely scipy")
     sys.exit(1)
 
+try:
+    from numba import njit  # Optional: JIT per-cluster accumulation
+except ImportError:
+    njit = None
+
 # Paths
 BASE_DIR = Path(__file__).parent.parent
 DB_PATH = BASE_DIR / "db.sqlite3"
 KEYSTONES_PATH = BASE_DIR / "data" / "keystones_with_boundaries.json"
 GHSL_ZIP_PATH = BASE_DIR / "data" / "ghsl_examples.zip"
+BOUNDS_CACHE = BASE_DIR / "data" / "ghsl_bounds.json"  # Tile bounds sidecar, per ZIP
+
+# GDAL block cache shared by all windowed reads
+GDAL_CACHEMAX_MB = 512
+
+# Per-connection SQLite tuning for the write-heavy settlement inserts
+SQLITE_PRAGMAS = (
+    'PRAGMA synchronous=NORMAL',  # Safe with WAL: no fsync on every commit
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-65536',  # 64 MB page cache
+    'PRAGMA mmap_size=268435456',  # 256 MB memory-mapped I/O
+)
 
 # Detection parameters
 MIN_BUILT_UP_M2 = 500  # Minimum m² to count as settlement
 MIN_CLUSTER_PIXELS = 5  # Minimum pixels for a cluster
 HOUSEHOLD_SIZE = 5.2  # Average people per household
 PIXEL_SIZE_M = 100  # 100m resolution
+PLACE_PREFILTER_DEG = 1.0  # Nearest-place bbox margin around the park's settlements
+
+# Tile bounds in Mollweide, same fields as rasterio's BoundingBox
+BBox = namedtuple('BBox', 'left bottom right top')
+
+# Tile row/col in GHSL folder and file names, e.g. ..._V1_0_R8_C19
+_RC_RE = re.compile(r'R(\d+)_C(\d+)')
 
 # Coordinate transformers
 wgs84_to_moll = Transformer.from_crs("EPSG:4326", "ESRI:54009", always_xy=True)
@@ -94,65 +125,183 @@ def haversine_km(lat1, lon1, lat2, lon2) -> float:
     a = math.sin(dlat/2)**2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon/2)**2
     return R * 2 * math.asin(math.sqrt(a))
 
+# Vectorized variants of the helpers above, for whole batches of settlements
+CARDINALS_ARR = np.array(CARDINALS, dtype=object)
+
+def bearing_to_cardinal_vec(bearings: np.ndarray) -> np.ndarray:
+    """Convert an array of bearings (0-360) to cardinal directions"""
+    return np.take(CARDINALS_ARR, ((np.asarray(bearings) + 11.25) // 22.5).astype(int) % 16)
+
+def calc_bearing_vec(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Bearings from points 1 to points 2, element-wise"""
+    lat1_r, lat2_r = np.radians(lat1), np.radians(lat2)
+    dlon = np.radians(np.asarray(lon2) - lon1)
+    x = np.sin(dlon) * np.cos(lat2_r)
+    y = np.cos(lat1_r) * np.sin(lat2_r) - np.sin(lat1_r) * np.cos(lat2_r) * np.cos(dlon)
+    return (np.degrees(np.arctan2(x, y)) + 360) % 360
+
+def haversine_km_vec(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Distances in km between points, element-wise"""
+    R = 6371
+    lat1_r, lat2_r = np.radians(lat1), np.radians(lat2)
+    dlat = lat2_r - lat1_r
+    dlon = np.radians(np.asarray(lon2) - lon1)
+    a = np.sin(dlat/2)**2 + np.cos(lat1_r) * np.cos(lat2_r) * np.sin(dlon/2)**2
+    # arctan2 form stays accurate when a rounds to 1 (near-antipodal points)
+    return R * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def _accumulate_clusters_numpy(labeled: np.ndarray, num_features: int, pop_arr: np.ndarray):
+    """Per-label pixel counts, row/col sums and population sums (background left at 0)"""
+    index = np.arange(1, num_features + 1)
+    cnt = np.zeros(num_features + 1, dtype=np.int64)
+    sr = np.zeros(num_features + 1)
+    sc = np.zeros(num_features + 1)
+    psum = np.zeros(num_features + 1)
+    
+    # scipy.ndimage label reductions: no per-cluster masks or full-size coordinate grids
+    cnt[1:] = np.bincount(labeled.ravel(), minlength=num_features + 1)[1:]
+    centers = np.array(ndimage.center_of_mass(labeled > 0, labeled, index)).reshape(-1, 2)
+    sr[1:] = centers[:, 0] * cnt[1:]
+    sc[1:] = centers[:, 1] * cnt[1:]
+    if pop_arr.size:
+        psum[1:] = ndimage.sum_labels(pop_arr, labeled, index)
+    return cnt, sr, sc, psum
+
+if njit is not None:
+    @njit(cache=True)
+    def _accumulate_clusters(labeled, num_features, pop_arr):
+        """Same sums as _accumulate_clusters_numpy in a single sweep (background left at 0)"""
+        n = num_features + 1
+        cnt = np.zeros(n, dtype=np.int64)
+        sr = np.zeros(n, dtype=np.float64)
+        sc = np.zeros(n, dtype=np.float64)
+        psum = np.zeros(n, dtype=np.float64)
+        has_pop = pop_arr.size > 0
+        h, w = labeled.shape
+        for r in range(h):
+            for c in range(w):
+                label = labeled[r, c]
+                if label != 0:
+                    cnt[label] += 1
+                    sr[label] += r
+                    sc[label] += c
+                    if has_pop:
+                        psum[label] += pop_arr[r, c]
+        return cnt, sr, sc, psum
+else:
+    _accumulate_clusters = _accumulate_clusters_numpy
+
 
 class GHSLProcessor:
-    def __init__(self, zip_path: Path = GHSL_ZIP_PATH):
-        self.zip_path = zip_path
+    def __init__(self, zip_path: Path = GHSL_ZIP_PATH, tile_index: Optional[Dict] = None):
+        self.zip_path = Path(zip_path).resolve()  # /vsizip/ paths need it absolute
+        self._env = rasterio.Env(GDAL_CACHEMAX=GDAL_CACHEMAX_MB)
+        self._env.__enter__()
+        if tile_index is not None:
+            # Pool worker: the parent has indexed the ZIP, projected the parks and set up the table
+            self.tile_index = tile_index
+            self._build_tile_tree(tile_index)
+            return
         self.tile_index = self._build_tile_index()
         self.keystones = self._load_keystones()
         self._init_db()
+    
+    def __del__(self):
+        if hasattr(self, '_env') and self._env:
+            self._env.__exit__(None, None, None)
         
     def _load_keystones(self) -> List[Dict]:
-        """Load keystones with geometry"""
+        """Load keystones with geometry, pre-projected to Mollweide"""
         with open(KEYSTONES_PATH) as f:
-            return [p for p in json.load(f) if p.get('geometry')]
+            parks = [p for p in json.load(f) if p.get('geometry')]
+        for park in parks:
+            self._geom_moll(park)
+        return parks
+    
+    def _geom_moll(self, park: Dict):
+        """Park geometry in Mollweide, projected once and stashed on the park with its bounds"""
+        if '_geom_moll' not in park:
+            # Pass the transformer itself so pyproj projects each ring's coordinate
+            # arrays in one call, rather than a Python lambda per vertex
+            park['_geom_moll'] = shp_transform(wgs84_to_moll.transform, shape(park['geometry']))
+            park['_bounds_moll'] = park['_geom_moll'].bounds
+        return park['_geom_moll']
     
     def _build_tile_index(self) -> Dict:
         """Index tiles in ZIP file with actual bounds"""
         index = {'BUILT_S': {}, 'POP': {}, 'bounds': {}}
         
+        # Bounds from a previous run, valid while the ZIP is unchanged
+        stat = self.zip_path.stat()
+        zip_id = [str(self.zip_path), stat.st_size, stat.st_mtime]
+        cached = {}
+        if BOUNDS_CACHE.exists():
+            try:
+                with open(BOUNDS_CACHE) as f:
+                    cache = json.load(f)
+                if cache.get('zip') == zip_id:
+                    cached = cache['bounds']
+            except (ValueError, KeyError):
+                pass  # Corrupt sidecar, rebuild
+        
         with zipfile.ZipFile(self.zip_path, 'r') as zf:
             for name in zf.namelist():
                 if not name.endswith('.tif') or '__MACOSX' in name:
                     continue
                 
-                # Parse R{row}_C{col} from path
-                folder = name.split('/')[0]
-                row = col = None
-                for part in folder.split('_'):
-                    if part.startswith('R') and part[1:].isdigit():
-                        row = int(part[1:])
-                    elif part.startswith('C') and part[1:].isdigit():
-                        col = int(part[1:])
-                
-                if row is None or col is None:
+                # Parse R{row}_C{col} from the top-level folder
+                m = _RC_RE.search(name.split('/')[0])
+                if not m:
                     continue
                 
-                key = f"R{row}_C{col}"
+                key = f"R{int(m[1])}_C{int(m[2])}"
                 
                 # Prefer 100m resolution for efficiency
                 if 'BUILT_S' in name and '_100_' in name:
                     index['BUILT_S'][key] = name
                     # Read actual bounds from file
-                    if key not in index['bounds']:
+                    if key in cached:
+                        index['bounds'][key] = BBox(*cached[key])
+                    elif key not in index['bounds']:
                         try:
-                            with zf.open(name) as f:
-                                data = f.read()
-                            with MemoryFile(data) as memfile:
-                                with memfile.open() as src:
-                                    index['bounds'][key] = src.bounds
+                            # Header only: GDAL seeks to the TIFF IFD, no pixel data is inflated
+                            with rasterio.open(f"/vsizip/{self.zip_path}/{name}") as src:
+                                index['bounds'][key] = src.bounds
                         except:
                             pass
                 elif 'POP' in name and '_100_' in name:
                     index['POP'][key] = name
         
+        if index['bounds'].keys() != cached.keys():
+            with open(BOUNDS_CACHE, 'w') as f:
+                json.dump({'zip': zip_id,
+                           'bounds': {k: list(b) for k, b in index['bounds'].items()}}, f, indent=2)
+        
+        self._build_tile_tree(index)
+        
         log(f"Tile index: {len(index['BUILT_S'])} BUILT_S, {len(index['POP'])} POP tiles")
         log(f"Tile bounds: {list(index['bounds'].keys())}")
         return index
     
+    def _build_tile_tree(self, index: Dict):
+        """R-tree over the tile footprints for park-to-tile lookups"""
+        bounds = index['bounds']
+        self._tile_keys = list(bounds.keys())
+        self._tile_boxes = [box(b.left, b.bottom, b.right, b.top) for b in bounds.values()]
+        self._tile_tree = STRtree(self._tile_boxes)
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a database connection with the processor's PRAGMAs applied"""
+        conn = sqlite3.connect(DB_PATH)
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
     def _init_db(self):
         """Initialize database table"""
-        conn = sqlite3.connect(DB_PATH)
+        conn = self._connect()
+        conn.execute('PRAGMA journal_mode=WAL')  # Persistent: stored in the DB file
         conn.execute('''
             CREATE TABLE IF NOT EXISTS park_settlements (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -169,180 +318,158 @@ class GHSLProcessor:
             )
         ''')
         conn.execute('CREATE INDEX IF NOT EXISTS idx_settlements_park ON park_settlements(park_id)')
+        # Composite index for bbox-prefiltered place lookups (osm_places is
+        # created by download_osm_places.py, which may not have run yet)
+        has_places = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='osm_places'"
+        ).fetchone()
+        if has_places:
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_osm_places_park_lat_lon ON osm_places(park_id, lat, lon)")
         conn.commit()
         conn.close()
     
-    def _get_tiles_for_park(self, park: Dict) -> List[str]:
-        """Find tiles that overlap with park using actual tile bounds"""
-        geom = shape(park['geometry'])
-        geom_moll = shp_transform(lambda x, y: wgs84_to_moll.transform(x, y), geom)
-        
-        overlapping = []
-        for key, bounds in self.tile_index.get('bounds', {}).items():
-            # bounds is a BoundingBox(left, bottom, right, top)
-            tile_box = box(bounds.left, bounds.bottom, bounds.right, bounds.top)
-            if geom_moll.intersects(tile_box):
-                overlapping.append(key)
-        
-        return overlapping
+    def _get_tiles_for_park(self, geom_moll) -> List[str]:
+        """Find tiles that overlap with the park's Mollweide geometry using actual tile bounds"""
+        # R-tree narrows to tiles whose boxes overlap the park's bbox; the exact test
+        # then runs against a prepared geometry, built once for all candidates
+        candidates = self._tile_tree.query(geom_moll)
+        if len(candidates) == 0:
+            return []
+        pg = prep(geom_moll)
+        return [self._tile_keys[i] for i in sorted(candidates) if pg.intersects(self._tile_boxes[i])]
     
     def _read_tile_windowed(self, tif_path: str, park_bounds_moll: tuple) -> Optional[Tuple[np.ndarray, dict]]:
         """Read only the park area from a tile using windowed read"""
         try:
-            with zipfile.ZipFile(self.zip_path, 'r') as zf:
-                with zf.open(tif_path) as f:
-                    data = f.read()
-            
-            with MemoryFile(data) as memfile:
-                with memfile.open() as src:
-                    # Get window for park bounds
-                    minx, miny, maxx, maxy = park_bounds_moll
-                    
-                    # Clamp to tile bounds
-                    tile_bounds = src.bounds
-                    minx = max(minx, tile_bounds.left)
-                    miny = max(miny, tile_bounds.bottom)
-                    maxx = min(maxx, tile_bounds.right)
-                    maxy = min(maxy, tile_bounds.top)
-                    
-                    if minx >= maxx or miny >= maxy:
-                        return None
-                    
-                    # Create window from bounds
-                    window = from_bounds(minx, miny, maxx, maxy, src.transform)
-                    
-                    # Clamp window to valid range
-                    window = Window(
-                        max(0, int(window.col_off)),
-                        max(0, int(window.row_off)),
-                        min(int(window.width), src.width - max(0, int(window.col_off))),
-                        min(int(window.height), src.height - max(0, int(window.row_off)))
-                    )
-                    
-                    if window.width <= 0 or window.height <= 0:
-                        return None
-                    
-                    # Read windowed data
-                    arr = src.read(1, window=window)
-                    win_transform = src.window_transform(window)
-                    
-                    return arr, {
-                        'transform': win_transform,
-                        'crs': src.crs,
-                        'nodata': src.nodata,
-                        'bounds': (minx, miny, maxx, maxy)
-                    }
+            # GDAL reads the TIF in place inside the ZIP, fetching only the blocks under the window
+            with rasterio.open(f"/vsizip/{self.zip_path}/{tif_path}") as src:
+                # Get window for park bounds
+                minx, miny, maxx, maxy = park_bounds_moll
+                
+                # Clamp to tile bounds
+                tile_bounds = src.bounds
+                minx = max(minx, tile_bounds.left)
+                miny = max(miny, tile_bounds.bottom)
+                maxx = min(maxx, tile_bounds.right)
+                maxy = min(maxy, tile_bounds.top)
+                
+                if minx >= maxx or miny >= maxy:
+                    return None
+                
+                # Create window from bounds
+                window = from_bounds(minx, miny, maxx, maxy, src.transform)
+                
+                # Clamp window to valid range
+                window = Window(
+                    max(0, int(window.col_off)),
+                    max(0, int(window.row_off)),
+                    min(int(window.width), src.width - max(0, int(window.col_off))),
+                    min(int(window.height), src.height - max(0, int(window.row_off)))
+                )
+                
+                if window.width <= 0 or window.height <= 0:
+                    return None
+                
+                # Read windowed data
+                arr = src.read(1, window=window)
+                win_transform = src.window_transform(window)
+                
+                return arr, {
+                    'transform': win_transform,
+                    'crs': src.crs,
+                    'nodata': src.nodata,
+                    'bounds': (minx, miny, maxx, maxy)
+                }
         except Exception as e:
             log(f"  Error reading tile: {e}")
             return None
     
-    def _find_nearest_place(self, lat: float, lon: float, park_id: str) -> Optional[Tuple[str, float, str]]:
-        """Find nearest place from osm_places table"""
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Search within 100km
-        cursor.execute('''
-            SELECT name, lat, lon, place_type
-            FROM osm_places
-            WHERE park_id = ?
-            ORDER BY (lat - ?)*(lat - ?) + (lon - ?)*(lon - ?)
-            LIMIT 1
-        ''', (park_id, lat, lat, lon, lon))
-        
-        row = cursor.fetchone()
-        conn.close()
-        
-        if row:
-            name, place_lat, place_lon, place_type = row
-            dist = haversine_km(lat, lon, place_lat, place_lon)
-            bearing = calc_bearing(place_lat, place_lon, lat, lon)
-            direction = bearing_to_cardinal(bearing)
-            return (name, dist, direction)
-        return None
-    
     def _extract_settlements(self, park: Dict, built_arr: np.ndarray, meta: dict, 
                             pop_arr: Optional[np.ndarray]) -> List[Dict]:
         """Extract settlement clusters from built-up array"""
         if built_arr is None or built_arr.size == 0:
             return []
         
-        # Threshold: pixels with >500 m² built-up area
+        # Threshold: pixels with >500 m² built-up area, typed to the raster's native
+        # integer dtype so the compare streams the narrow array without upcasting
         threshold = MIN_BUILT_UP_M2
-        binary = (built_arr > threshold).astype(np.uint8)
+        if np.issubdtype(built_arr.dtype, np.integer):
+            info = np.iinfo(built_arr.dtype)
+            if info.min <= threshold <= info.max:
+                threshold = built_arr.dtype.type(threshold)
         
-        if binary.sum() == 0:
+        # Remote parks: a single reduction skips the mask and labeling entirely
+        if built_arr.max() <= threshold:
             return []
+        binary = built_arr > threshold  # bool: ndimage.label takes it as is, no uint8 copy
         
         # Label connected components
         labeled, num_features = ndimage.label(binary)
         
-        settlements = []
+        # Counts, centroid sums and population sums for every cluster in one sweep
+        has_pop = pop_arr is not None and pop_arr.shape == built_arr.shape
+        pop = pop_arr if has_pop else np.empty((0, 0), dtype=np.float32)  # Native dtype, summed in float64
+        cnt, sr, sc, psum = _accumulate_clusters(labeled, num_features, pop)
+        
+        # Clusters 1..499 (limit to 500 clusters) with enough pixels
+        ids = np.arange(1, min(num_features + 1, 500))
+        ids = ids[cnt[ids] >= MIN_CLUSTER_PIXELS]
+        if len(ids) == 0:
+            return []
+        
+        # Centroids to Mollweide, then all to WGS84 in one PROJ call
         transform = meta['transform']
+        xs = transform.c + (sc[ids] / cnt[ids]) * transform.a
+        ys = transform.f + (sr[ids] / cnt[ids]) * transform.e
+        lons, lats = moll_to_wgs84.transform(xs, ys)
         
-        for cluster_id in range(1, min(num_features + 1, 500)):  # Limit to 500 clusters
-            mask = labeled == cluster_id
-            pixel_count = mask.sum()
-            
-            if pixel_count < MIN_CLUSTER_PIXELS:
-                continue
-            
-            # Calculate centroid
-            rows, cols = np.where(mask)
-            center_row = rows.mean()
-            center_col = cols.mean()
-            
-            # Convert to Mollweide coordinates
-            x = transform.c + center_col * transform.a
-            y = transform.f + center_row * transform.e
-            
-            # Convert to WGS84
-            lon, lat = moll_to_wgs84.transform(x, y)
-            
-            # Calculate area
-            area_m2 = pixel_count * PIXEL_SIZE_M * PIXEL_SIZE_M
-            
-            # Estimate population if pop data available
-            pop_estimate = 0
-            if pop_arr is not None and pop_arr.shape == built_arr.shape:
-                pop_estimate = pop_arr[mask].sum()
-            else:
-                # Estimate from built area
-                buildings = area_m2 / 50  # Assume 50m² per building
-                pop_estimate = buildings * HOUSEHOLD_SIZE
-            
-            settlements.append({
-                'lat': round(lat, 6),
-                'lon': round(lon, 6),
-                'area_m2': round(area_m2, 1),
-                'population_estimate': round(pop_estimate, 0)
-            })
-        
-        return settlements
+        # Calculate area
+        areas = cnt[ids] * PIXEL_SIZE_M * PIXEL_SIZE_M
+        
+        # Population from pop data if available, else estimated from built area
+        if has_pop:
+            pops = psum[ids]
+        else:
+            pops = areas / 50 * HOUSEHOLD_SIZE  # Assume 50m² per building
+        
+        return [
+            {
+                'lat': round(float(lat), 6),
+                'lon': round(float(lon), 6),
+                'area_m2': round(float(area_m2), 1),
+                'population_estimate': round(float(pop_estimate), 0)
+            }
+            for lat, lon, area_m2, pop_estimate in zip(lats, lons, areas, pops)
+        ]
     
     def process_park(self, park: Dict, dry_run: bool = False) -> int:
         """Process a single park, return settlement count"""
+        # One connection for the checkpoint, the place lookup and the inserts
+        conn = self._connect()
+        try:
+            return self._process_park(conn, park, dry_run)
+        finally:
+            conn.close()
+    
+    def _process_park(self, conn: sqlite3.Connection, park: Dict, dry_run: bool) -> int:
         park_id = park['id']
         park_name = park['name']
         
         # Check if already processed
         if not dry_run:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute('SELECT COUNT(*) FROM park_settlements WHERE park_id = ?', (park_id,))
-            existing = cursor.fetchone()[0]
-            conn.close()
+            existing = conn.execute(
+                'SELECT COUNT(*) FROM park_settlements WHERE park_id = ?', (park_id,)
+            ).fetchone()[0]
             if existing > 0:
                 log(f"  {park_id}: already has {existing} settlements, skipping")
                 return existing
         
         # Get park bounds in Mollweide
-        geom = shape(park['geometry'])
-        geom_moll = shp_transform(lambda x, y: wgs84_to_moll.transform(x, y), geom)
-        park_bounds = geom_moll.bounds
+        geom_moll = self._geom_moll(park)
+        park_bounds = park['_bounds_moll']
         
         # Find overlapping tiles
-        tiles = self._get_tiles_for_park(park)
+        tiles = self._get_tiles_for_park(geom_moll)
         if not tiles:
             log(f"  {park_id}: no tiles available")
             return 0
@@ -380,11 +507,41 @@ class GHSLProcessor:
             log(f"  {park_id}: no settlements found")
             return 0
         
-        # Add place context for each settlement
-        for s in all_settlements:
-            place_info = self._find_nearest_place(s['lat'], s['lon'], park_id)
-            if place_info:
-                name, dist, direction = place_info
+        # Add place context: load the park's places once, match every settlement by argmin
+        slat = np.array([s['lat'] for s in all_settlements], dtype=np.float64)
+        slon = np.array([s['lon'] for s in all_settlements], dtype=np.float64)
+        
+        # Index range scan over places near the settlements first
+        m = PLACE_PREFILTER_DEG
+        places = conn.execute('''
+            SELECT name, lat, lon FROM osm_places
+            WHERE park_id = ? AND lat BETWEEN ? AND ? AND lon BETWEEN ? AND ?
+        ''', (park_id, slat.min() - m, slat.max() + m, slon.min() - m, slon.max() + m)).fetchall()
+        
+        nearest = dists = directions = [None] * len(all_settlements)
+        for prefiltered in (True, False):
+            if not prefiltered:
+                # A match farther than the margin may have a closer place outside the bbox
+                places = conn.execute(
+                    'SELECT name, lat, lon FROM osm_places WHERE park_id = ?', (park_id,)
+                ).fetchall()
+            if not places:
+                continue
+            plat = np.array([p[1] for p in places], dtype=np.float64)
+            plon = np.array([p[2] for p in places], dtype=np.float64)
+            d2 = (plat[None, :] - slat[:, None])**2 + (plon[None, :] - slon[:, None])**2
+            nearest = d2.argmin(axis=1)
+            if d2[np.arange(len(nearest)), nearest].max() <= m * m:
+                break
+        
+        if places:
+            # Distances and directions for the whole batch in one call each
+            dists = haversine_km_vec(slat, slon, plat[nearest], plon[nearest])
+            directions = bearing_to_cardinal_vec(calc_bearing_vec(plat[nearest], plon[nearest], slat, slon))
+        
+        for s, i, dist, direction in zip(all_settlements, nearest, dists, directions):
+            if i is not None:
+                name = places[i][0]
                 s['nearest_place'] = name
                 s['distance_km'] = round(dist, 1)
                 s['direction'] = direction
@@ -398,27 +555,24 @@ class GHSLProcessor:
                 log(f"    - {s['description']}")
             return len(all_settlements)
         
-        # Save to database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        for s in all_settlements:
-            cursor.execute('''
+        # Save to database in a single transaction
+        rows = [
+            (park_id, s['lat'], s['lon'], s['area_m2'], s['population_estimate'],
+             s.get('nearest_place'), s.get('distance_km'), s.get('direction'), s['description'])
+            for s in all_settlements
+        ]
+        with conn:
+            conn.executemany('''
                 INSERT INTO park_settlements 
                 (park_id, lat, lon, area_m2, population_estimate, nearest_place, distance_km, direction, description)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                park_id, s['lat'], s['lon'], s['area_m2'], s['population_estimate'],
-                s.get('nearest_place'), s.get('distance_km'), s.get('direction'), s['description']
-            ))
-        
-        conn.commit()
-        conn.close()
+            ''', rows)
         
         log(f"  {park_id}: inserted {len(all_settlements)} settlements")
         return len(all_settlements)
     
-    def process_all(self, dry_run: bool = False, limit: int = None, park_id: str = None):
+    def process_all(self, dry_run: bool = False, limit: int = None, park_id: str = None,
+                    workers: int = 1):
         """Process all parks"""
         log(f"Starting GHSL processing (dry_run={dry_run}, limit={limit})")
         
@@ -428,35 +582,69 @@ class GHSLProcessor:
         if limit:
             parks = parks[:limit]
         
-        log(f"Processing {len(parks)} parks...")
+        log(f"Processing {len(parks)} parks with {workers} worker(s)...")
         
         total_settlements = 0
         processed = 0
         errors = 0
         
-        for i, park in enumerate(parks, 1):
-            try:
+        if workers > 1 and len(parks) > 1:
+            # Parks are independent windows and rows; each worker keeps its own processor
+            # and connections, and WAL lets their inserts run alongside each other
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                           initargs=(self.zip_path, self.tile_index))
+            results = executor.map(_process_one, parks, [dry_run] * len(parks), chunksize=1)
+        else:
+            executor = None
+            results = (_run_park(self, park, dry_run) for park in parks)
+        
+        try:
+            for i, (park, (count, error)) in enumerate(zip(parks, results), 1):
                 log(f"[{i}/{len(parks)}] {park['id']}...")
-                count = self.process_park(park, dry_run)
-                total_settlements += count
-                processed += 1
-            except Exception as e:
-                log(f"  ERROR processing {park['id']}: {e}")
-                errors += 1
+                if error is not None:
+                    log(f"  ERROR processing {park['id']}: {error}")
+                    errors += 1
+                else:
+                    total_settlements += count
+                    processed += 1
+        finally:
+            if executor is not None:
+                executor.shutdown()
         
         log(f"\nComplete: {processed} parks, {total_settlements} settlements, {errors} errors")
         return total_settlements
 
 
+# Per-process processor for ProcessPoolExecutor workers
+_worker: Optional[GHSLProcessor] = None
+
+def _init_worker(zip_path: Path, tile_index: Dict):
+    global _worker
+    _worker = GHSLProcessor(zip_path, tile_index)
+
+def _run_park(processor: GHSLProcessor, park: Dict, dry_run: bool) -> Tuple[Optional[int], Optional[str]]:
+    """Process one park, returning (count, None) or (None, error message)"""
+    try:
+        return processor.process_park(park, dry_run), None
+    except Exception as e:
+        return None, str(e)
+
+def _process_one(park: Dict, dry_run: bool) -> Tuple[Optional[int], Optional[str]]:
+    return _run_park(_worker, park, dry_run)
+
+
 def main():
     parser = argparse.ArgumentParser(description='GHSL Background Processor')
     parser.add_argument('--park', help='Process single park by ID')
     parser.add_argument('--dry-run', action='store_true', help='Show what would be done')
     parser.add_argument('--limit', type=int, help='Limit number of parks')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Parallel worker processes (default: 1)')
     args = parser.parse_args()
     
     processor = GHSLProcessor()
-    processor.process_all(dry_run=args.dry_run, limit=args.limit, park_id=args.park)
+    processor.process_all(dry_run=args.dry_run, limit=args.limit, park_id=args.park,
+                          workers=args.workers)
 
 
 if __name__ == '__main__':
@@ -10,22 +10,24 @@ Usage:
     python scripts/ghsl_processor_streaming.py --zip /path/to/tile.zip
 """
 
+import re
+import math
 import json
 import sqlite3
 import zipfile
-import tempfile
 import shutil
 import argparse
 import logging
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
-import numpy as np
 
 try:
     from pyproj import Transformer
     import rasterio
-    from rasterio.mask import mask
+    from rasterio.features import geometry_mask
+    from rasterio.windows import from_bounds, Window
+    from rasterio.errors import WindowError
     from shapely.geometry import shape, mapping
     from shapely.ops import transform
 except ImportError as e:
@@ -47,6 +49,9 @@ GRID_ORIGIN_Y = 9000000
 MIN_BUILT_UP = 1  # Minimum m² to count
 BUFFER_M = 10000  # 10km buffer
 
+# Tile row/col in GHSL file names, e.g. ..._V1_0_R8_C19.zip
+_RC_RE = re.compile(r'R(\d+)_C(\d+)')
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -86,13 +91,10 @@ class GHSLStreamingProcessor:
     def get_tile_id(self, zip_name: str) -> Optional[Tuple[int, int]]:
         """Extract (row, col) from tile ZIP filename"""
         # GHS_BUILT_S_E2018_GLOBE_R2023A_54009_10_V1_0_R8_C19.zip
-        try:
-            parts = zip_name.replace('.zip', '').split('_')
-            row_part = next(p for p in parts if p.startswith('R') and p[1:].isdigit())
-            col_part = next(p for p in parts if p.startswith('C') and p[1:].isdigit())
-            return (int(row_part[1:]), int(col_part[1:]))
-        except:
+        m = _RC_RE.search(zip_name)
+        if not m:
             return None
+        return (int(m[1]), int(m[2]))
     
     def get_parks_for_tile(self, row: int, col: int) -> List[Dict]:
         """Find parks that overlap with this tile"""
@@ -134,40 +136,34 @@ class GHSLStreamingProcessor:
         if not parks:
             return {'parks_processed': 0}
         
-        # Extract TIF to temp directory
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmpdir = Path(tmpdir)
-            
-            with zipfile.ZipFile(zip_path, 'r') as zf:
-                tif_files = [n for n in zf.namelist() if n.endswith('.tif')]
-                if not tif_files:
-                    return {'error': 'No TIF file in ZIP'}
-                
-                zf.extract(tif_files[0], tmpdir)
-                tif_path = tmpdir / tif_files[0]
-            
-            # Process each park
-            results = {'parks_processed': 0, 'settlements_found': 0}
-            conn = sqlite3.connect(DB_PATH)
-            
-            for park in parks:
-                try:
-                    stats = self.analyze_park_tile(park, tif_path)
-                    if stats:
-                        self.save_park_stats(conn, park['id'], stats)
-                        results['parks_processed'] += 1
-                        results['settlements_found'] += stats.get('settlement_count', 0)
-                except Exception as e:
-                    logger.warning(f"  Error processing {park['id']}: {e}")
-            
-            conn.commit()
-            conn.close()
+        # Find the TIF inside the ZIP; GDAL reads it in place, nothing is extracted to disk
+        with zipfile.ZipFile(zip_path, 'r') as zf:
+            tif_files = [n for n in zf.namelist() if n.endswith('.tif')]
+        if not tif_files:
+            return {'error': 'No TIF file in ZIP'}
+        tif_path = f"/vsizip/{zip_path.resolve()}/{tif_files[0]}"
+        
+        # Process each park
+        results = {'parks_processed': 0, 'settlements_found': 0}
+        conn = sqlite3.connect(DB_PATH)
+        
+        for park in parks:
+            try:
+                stats = self.analyze_park_tile(park, tif_path)
+                if stats:
+                    self.save_park_stats(conn, park['id'], stats)
+                    results['parks_processed'] += 1
+                    results['settlements_found'] += stats.get('settlement_count', 0)
+            except Exception as e:
+                logger.warning(f"  Error processing {park['id']}: {e}")
+        
+        conn.commit()
+        conn.close()
         
-        # TIF is automatically cleaned up when tempdir exits
         return results
     
-    def analyze_park_tile(self, park: Dict, tif_path: Path) -> Optional[Dict]:
-        """Analyze GHSL data for a park from a single tile"""
+    def analyze_park_tile(self, park: Dict, tif_path: str) -> Optional[Dict]:
+        """Analyze GHSL data for a park from a single tile (a path or /vsizip/ URI)"""
         park_id = park['id']
         geom = shape(park['geometry'])
         
@@ -179,24 +175,37 @@ class GHSLStreamingProcessor:
         park_area_km2 = park.get('area_km2') or (geom_moll.area / 1e6)
         
         with rasterio.open(tif_path) as src:
+            # Read only the park's bounding window, clipped to the tile. Offsets are
+            # floored and the far edges ceiled (rounding the length could drop the
+            # last row or column under the park)
+            frac = from_bounds(*geom_moll.bounds, src.transform)
+            col0, row0 = math.floor(frac.col_off), math.floor(frac.row_off)
+            col1 = math.ceil(frac.col_off + frac.width)
+            row1 = math.ceil(frac.row_off + frac.height)
+            window = Window(col0, row0, col1 - col0, row1 - row0)
             try:
-                out_image, out_transform = mask(src, [mapping(geom_moll)], crop=True, nodata=0)
-            except Exception as e:
+                window = window.intersection(Window(0, 0, src.width, src.height))
+            except WindowError:
                 logger.debug(f"  {park_id}: no overlap with tile")
                 return None
-            
-            # Calculate built-up area
-            valid_data = out_image[out_image >= MIN_BUILT_UP]
-            built_up_m2 = np.sum(valid_data)
-            built_up_km2 = built_up_m2 / 1e6
-            
-            # Count settlements (connected components)
-            settlement_count = 0
-            if built_up_m2 > 0:
-                binary = (out_image[0] >= MIN_BUILT_UP).astype(np.uint8)
-                from scipy import ndimage
-                labeled, num_features = ndimage.label(binary)
-                settlement_count = num_features
+            arr = src.read(1, window=window)
+            win_transform = src.window_transform(window)
+        
+        # Rasterize the park polygon onto the window (True inside the park)
+        inside = geometry_mask([mapping(geom_moll)], out_shape=arr.shape,
+                               transform=win_transform, invert=True)
+        binary = inside & (arr >= MIN_BUILT_UP)
+        
+        # Calculate built-up area
+        built_up_m2 = arr[binary].sum()
+        built_up_km2 = built_up_m2 / 1e6
+        
+        # Count settlements (connected components)
+        settlement_count = 0
+        if built_up_m2 > 0:
+            from scipy import ndimage
+            labeled, num_features = ndimage.label(binary)
+            settlement_count = num_features
         
         return {
             'built_up_area_km2': built_up_km2,
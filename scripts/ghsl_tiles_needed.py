@@ -14,92 +14,330 @@ https://human-settlement.emergency.copernicus.eu/download.php?ds=bu&level=S&kw=2
 Or from JRC FTP:
 https://jeodpp.jrc.ec.europa.eu/ftp/jrc-opendata/GHSL/GHS_BUILT_S_GLOBE_R2023A/GHS_BUILT_S_E2030_GLOBE_R2023A_54009_100/V1-0/GHS_BUILT_S_E2030_GLOBE_R2023A_54009_100_V1_0_R{row}_C{col}.zip
 
+Reads data/keystones.fgb instead of the JSON when it is present and up to date
+(see convert_keystones_to_fgb.py) and pyogrio is installed.
+
 Usage:
     python scripts/ghsl_tiles_needed.py
     python scripts/ghsl_tiles_needed.py --urls  # Generate download URLs
     python scripts/ghsl_tiles_needed.py --wget  # Generate wget commands
+    python scripts/ghsl_tiles_needed.py --numba # JIT tile enumeration (needs numba)
 """
 
+import os
+import sys
 import json
+import hashlib
 import argparse
+import threading
 from pathlib import Path
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache, lru_cache
+from itertools import product
+import numpy as np
 
 try:
-    from shapely.geometry import shape
-    from shapely.ops import transform as shp_transform
     from pyproj import Transformer
+    from pyproj.network import set_network_enabled
 except ImportError:
-    print("Required: pip install shapely pyproj")
+    print("Required: pip install pyproj")
     exit(1)
 
+try:
+    import orjson  # Optional: much faster parsing of the geometry-heavy keystones file
+except ImportError:
+    orjson = None
+
+try:
+    from numba import njit, prange  # Optional: --numba tile enumeration
+except ImportError:
+    njit = None
+
+try:
+    import pyogrio  # Optional: read bounds from the FlatGeobuf copy of the keystones
+    import pyogrio.raw
+except ImportError:
+    pyogrio = None
+
 BASE_DIR = Path(__file__).parent.parent
 KEYSTONES_PATH = BASE_DIR / "data" / "keystones_with_boundaries.json"
+KEYSTONES_FGB_PATH = BASE_DIR / "data" / "keystones.fgb"  # See convert_keystones_to_fgb.py
+CACHE_DIR = BASE_DIR / ".cache"  # tiles_<hash>.npz, keyed by keystones content
+
+# Coordinate transformer. Mollweide needs no datum grids, so keep PROJ off the
+# network, and build each CRS pair once per process (from_crs queries proj.db).
+set_network_enabled(False)
+
+@lru_cache(maxsize=8)
+def _get_transformer(src: str, dst: str) -> Transformer:
+    return Transformer.from_crs(src, dst, always_xy=True)
 
-# Coordinate transformer
-wgs84_to_moll = Transformer.from_crs("EPSG:4326", "ESRI:54009", always_xy=True)
+wgs84_to_moll = _get_transformer("EPSG:4326", "ESRI:54009")
+
+# Batches at least this large are split across threads (PROJ releases the GIL);
+# below it a single call beats the dispatch overhead
+PARALLEL_MIN_POINTS = 1_000_000
+
+_thread_local = threading.local()
+
+def _thread_transformer() -> Transformer:
+    """WGS84 -> Mollweide transformer owned by the calling thread (no shared PROJ context)"""
+    transformer = getattr(_thread_local, 'wgs84_to_moll', None)
+    if transformer is None:
+        transformer = Transformer.from_crs("EPSG:4326", "ESRI:54009", always_xy=True)
+        _thread_local.wgs84_to_moll = transformer
+    return transformer
+
+def transform_to_moll(xs: np.ndarray, ys: np.ndarray):
+    """Project WGS84 lon/lat arrays to Mollweide in place, threaded across CPUs for large batches
+    
+    Inputs that are already contiguous float64 are overwritten and returned;
+    anything else is copied into such a buffer first.
+    """
+    xs = np.ascontiguousarray(xs, dtype=np.float64)
+    ys = np.ascontiguousarray(ys, dtype=np.float64)
+    workers = os.cpu_count() or 1
+    if len(xs) < PARALLEL_MIN_POINTS or workers == 1:
+        wgs84_to_moll.transform(xs, ys, inplace=True)
+        return xs, ys
+    
+    # Contiguous slices are views, so each thread writes its slab straight into xs/ys
+    edges = np.linspace(0, len(xs), workers + 1).astype(int)
+    slabs = [slice(a, b) for a, b in zip(edges[:-1], edges[1:])]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda sl: _thread_transformer().transform(xs[sl], ys[sl], inplace=True), slabs))
+    return xs, ys
 
 # GHSL tile grid parameters (Mollweide projection)
 ORIGIN_X = -18041000
 ORIGIN_Y = 9000000
 TILE_SIZE = 1000000  # 1000km
 
-def get_tile_for_point(x, y):
-    """Get tile row/col for a Mollweide coordinate"""
-    col = int((x - ORIGIN_X) / TILE_SIZE)
-    row = int((ORIGIN_Y - y) / TILE_SIZE)
-    return (row, col)
+# Download URL prefixes (tile and resolution are appended per request)
+COPERNICUS_URL = "https://human-settlement.emergency.copernicus.eu/download.php?ds=bu&level=S&kw=2018&re=R2023A&pr=54009"
+JRC_URL = "https://jeodpp.jrc.ec.europa.eu/ftp/jrc-opendata/GHSL/GHS_BUILT_S_GLOBE_R2023A"
+JRC_PRODUCT = "GHS_BUILT_S_E2030_GLOBE_R2023A_54009"
 
-def get_tiles_needed():
-    """Calculate all tiles needed for keystone parks"""
-    with open(KEYSTONES_PATH) as f:
-        keystones = json.load(f)
-    
-    tiles_needed = set()
-    parks_per_tile = defaultdict(list)
+def _coord_arrays(coords):
+    """Yield (n, 2+) position arrays from nested GeoJSON coordinates; empty lists yield nothing"""
+    if not coords:
+        return
+    if isinstance(coords[0], (int, float)):
+        yield np.asarray([coords], dtype=np.float64)
+    elif coords[0] and isinstance(coords[0][0], (int, float)):
+        yield np.asarray(coords, dtype=np.float64)
+    else:
+        for c in coords:
+            yield from _coord_arrays(c)
+
+def _geometry_arrays(geom):
+    """Yield position arrays of a GeoJSON geometry, descending into (nested) collections"""
+    if geom['type'] == 'GeometryCollection':
+        for g in geom['geometries']:
+            yield from _geometry_arrays(g)
+    else:
+        yield from _coord_arrays(geom['coordinates'])
+
+# GeoJSON geometry types raw_bounds understands; parks with anything else are skipped
+GEOMETRY_TYPES = frozenset({'Point', 'MultiPoint', 'LineString', 'MultiLineString',
+                            'Polygon', 'MultiPolygon', 'GeometryCollection'})
+
+def raw_bounds(geom):
+    """
+    (minx, miny, maxx, maxy) of a GeoJSON geometry, straight from its coordinate lists.
+    Raises ValueError if it has no positions.
+    """
+    arrays = list(_geometry_arrays(geom))
+    if not arrays:
+        raise ValueError("geometry has no coordinates")
+    coords = np.concatenate([a[:, :2] for a in arrays])
+    return coords[:, 0].min(), coords[:, 1].min(), coords[:, 0].max(), coords[:, 1].max()
+
+def _use_fgb() -> bool:
+    """Whether the FlatGeobuf copy can be read and is at least as new as the JSON"""
+    return (pyogrio is not None and KEYSTONES_FGB_PATH.exists() and
+            KEYSTONES_FGB_PATH.stat().st_mtime >= KEYSTONES_PATH.stat().st_mtime)
+
+def _park_bounds_from_json(data: bytes):
+    """Park ids and WGS84 bounds from the GeoJSON keystones file"""
+    keystones = orjson.loads(data) if orjson else json.loads(data)
     
+    park_ids, bounds = [], []
     for ks in keystones:
-        if not ks.get('geometry'):
+        geom = ks.get('geometry')
+        if not geom or geom.get('type') not in GEOMETRY_TYPES:
             continue
         
+        # A malformed park is skipped, not fatal (stderr keeps the --wget/--urls output clean)
         try:
-            geom = shape(ks['geometry'])
-            geom_moll = shp_transform(lambda x, y: wgs84_to_moll.transform(x, y), geom)
-            
-            minx, miny, maxx, maxy = geom_moll.bounds
-            
-            for x in [minx, maxx]:
-                for y in [miny, maxy]:
-                    row, col = get_tile_for_point(x, y)
-                    tiles_needed.add((row, col))
-                    if ks['id'] not in parks_per_tile[(row, col)]:
-                        parks_per_tile[(row, col)].append(ks['id'])
-        except:
-            pass
+            bounds.append(raw_bounds(geom))
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            print(f"Skipping {ks.get('id')}: bad geometry ({type(e).__name__}: {e})", file=sys.stderr)
+            continue
+        park_ids.append(ks['id'])
+    return park_ids, np.array(bounds, dtype=np.float64).reshape(-1, 4)
+
+def _park_bounds_from_fgb():
+    """Park ids and WGS84 bounds from the FlatGeobuf copy, without decoding any geometry"""
+    fids, bounds = pyogrio.read_bounds(KEYSTONES_FGB_PATH)
+    _, id_fids, _, (ids,) = pyogrio.raw.read(KEYSTONES_FGB_PATH, columns=['id'],
+                                             read_geometry=False, return_fids=True)
+    id_by_fid = dict(zip(id_fids.tolist(), ids.tolist()))
+    return [id_by_fid[fid] for fid in fids.tolist()], np.asarray(bounds, dtype=np.float64).T
+
+def get_tile_index(use_numba: bool = False):
+    """Two-level tile index {(row, col): [(park_id, mbr), ...]}, cached by keystones content"""
+    use_fgb = _use_fgb()
+    data = (KEYSTONES_FGB_PATH if use_fgb else KEYSTONES_PATH).read_bytes()
+    
+    # The grid parameters are part of the key, so changing them invalidates too
+    h = hashlib.blake2b(data, digest_size=16)
+    h.update(repr((ORIGIN_X, ORIGIN_Y, TILE_SIZE)).encode())
+    cache_path = CACHE_DIR / f"tiles_{h.hexdigest()}.npz"
+    if cache_path.exists():
+        return _load_tile_index(cache_path)
     
-    return tiles_needed, parks_per_tile
+    park_ids, bounds = _park_bounds_from_fgb() if use_fgb else _park_bounds_from_json(data)
+    tile_index = _compute_tile_index(park_ids, bounds, use_numba)
+    
+    CACHE_DIR.mkdir(exist_ok=True)
+    _save_tile_index(cache_path, tile_index)
+    return tile_index
+
+def get_tiles_needed(use_numba: bool = False):
+    """Calculate all tiles needed for keystone parks: (tiles_needed, parks_per_tile)"""
+    tile_index = get_tile_index(use_numba)
+    parks_per_tile = {tile: {park_id for park_id, _ in entries} for tile, entries in tile_index.items()}
+    return set(tile_index), parks_per_tile
+
+def _save_tile_index(path: Path, tile_index):
+    """Write the index as flat arrays: tile i holds entries offsets[i]:offsets[i+1]"""
+    tiles = sorted(tile_index)
+    entries = [e for t in tiles for e in tile_index[t]]
+    np.savez(path,
+             tiles=np.array(tiles, dtype=np.int16).reshape(-1, 2),
+             offsets=np.cumsum([0] + [len(tile_index[t]) for t in tiles]),
+             ids=np.array([park_id for park_id, _ in entries], dtype=str),
+             mbrs=np.array([mbr for _, mbr in entries], dtype=np.float64).reshape(-1, 4))
 
+def _load_tile_index(path: Path):
+    """Inverse of _save_tile_index"""
+    with np.load(path) as z:
+        tiles, offsets = z['tiles'].tolist(), z['offsets'].tolist()
+        ids, mbrs = z['ids'].tolist(), z['mbrs'].tolist()
+    return {tuple(t): list(zip(ids[a:b], map(tuple, mbrs[a:b])))
+            for t, a, b in zip(tiles, offsets[:-1], offsets[1:])}
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def enumerate_tiles(minx, miny, maxx, maxy, origin_x, origin_y, tile_size):
+        """Flat int32 (park_idx, row, col) arrays of every tile each Mollweide MBR touches"""
+        n = minx.shape[0]
+        r0 = np.empty(n, dtype=np.int32)
+        c0 = np.empty(n, dtype=np.int32)
+        nr = np.empty(n, dtype=np.int32)
+        nc = np.empty(n, dtype=np.int32)
+        for i in prange(n):
+            c0[i] = int((minx[i] - origin_x) // tile_size)
+            r0[i] = int((origin_y - maxy[i]) // tile_size)
+            nc[i] = int((maxx[i] - origin_x) // tile_size) - c0[i] + 1
+            nr[i] = int((origin_y - miny[i]) // tile_size) - r0[i] + 1
+        
+        # Prefix sum of per-park tile counts gives each park its own output slice
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(nr.astype(np.int64) * nc)
+        park_idx = np.empty(offsets[n], dtype=np.int32)
+        rows = np.empty(offsets[n], dtype=np.int32)
+        cols = np.empty(offsets[n], dtype=np.int32)
+        for i in prange(n):
+            k = offsets[i]
+            for dr in range(nr[i]):
+                for dc in range(nc[i]):
+                    park_idx[k] = i
+                    rows[k] = r0[i] + dr
+                    cols[k] = c0[i] + dc
+                    k += 1
+        return park_idx, rows, cols
+else:
+    enumerate_tiles = None
+
+def _compute_tile_index(park_ids, b, use_numba: bool = False):
+    """Tiles covering each park's bbox (b: N x 4 WGS84 bounds), with the park's Mollweide MBR"""
+    tile_index = defaultdict(list)
+    
+    # Only the bounding box is used, so project the WGS84 bbox instead of every
+    # vertex. Mollweide x shrinks away from the equator, so the bbox edges are also
+    # sampled at the latitude closest to it: 6 points per park, one batched call.
+    xs = np.empty((len(park_ids), 6))
+    ys = np.empty((len(park_ids), 6))
+    xs[:, [0, 1, 4]] = b[:, [0]]
+    xs[:, [2, 3, 5]] = b[:, [2]]
+    ys[:, [0, 2]] = b[:, [1]]
+    ys[:, [1, 3]] = b[:, [3]]
+    ys[:, 4:] = np.clip(0.0, b[:, [1]], b[:, [3]])
+    
+    # Project each distinct point once: the equator samples coincide with corners
+    # for every park that does not straddle it, and neighbouring parks share edges
+    uniq, inverse = np.unique(np.stack([xs.ravel(), ys.ravel()], axis=1), axis=0, return_inverse=True)
+    ux, uy = transform_to_moll(uniq[:, 0], uniq[:, 1])
+    inverse = inverse.reshape(-1)
+    xs_m, ys_m = ux[inverse].reshape(-1, 6), uy[inverse].reshape(-1, 6)
+    minx, miny, maxx, maxy = xs_m.min(axis=1), ys_m.min(axis=1), xs_m.max(axis=1), ys_m.max(axis=1)
+    
+    # A park is listed, with its MBR, under every tile its MBR touches, so a tile's
+    # parks can be looked up directly without rescanning the keystones
+    mbrs = [tuple(m) for m in np.column_stack([minx, miny, maxx, maxy]).tolist()]
+    if use_numba:
+        park_idx, rows, cols = enumerate_tiles(minx, miny, maxx, maxy, ORIGIN_X, ORIGIN_Y, TILE_SIZE)
+        for i, row, col in zip(park_idx.tolist(), rows.tolist(), cols.tolist()):
+            tile_index[(row, col)].append((park_ids[i], mbrs[i]))
+        return dict(tile_index)
+    
+    # Tile row/col ranges of each Mollweide bbox, for all parks at once. Every tile
+    # in the range is needed, not just the corner ones: a park spanning 3+ tiles in
+    # both directions also covers the interior tiles.
+    c0 = np.floor_divide(minx - ORIGIN_X, TILE_SIZE).astype(np.int16)
+    c1 = np.floor_divide(maxx - ORIGIN_X, TILE_SIZE).astype(np.int16)
+    r0 = np.floor_divide(ORIGIN_Y - maxy, TILE_SIZE).astype(np.int16)
+    r1 = np.floor_divide(ORIGIN_Y - miny, TILE_SIZE).astype(np.int16)
+    
+    for park_id, mbr, pr0, pr1, pc0, pc1 in zip(park_ids, mbrs, r0.tolist(), r1.tolist(), c0.tolist(), c1.tolist()):
+        for tile in product(range(pr0, pr1 + 1), range(pc0, pc1 + 1)):
+            tile_index[tile].append((park_id, mbr))
+    
+    return dict(tile_index)
+
+@cache
 def get_download_url(row, col, product='BUILT_S', resolution=100):
     """Generate download URL for a tile"""
     # Copernicus emergency services URL
-    return f"https://human-settlement.emergency.copernicus.eu/download.php?ds=bu&level=S&kw=2018&re=R2023A&pr=54009&res={resolution}&tile=R{row}_C{col}"
+    return f"{COPERNICUS_URL}&res={resolution}&tile=R{row}_C{col}"
 
+@cache
 def get_jrc_url(row, col, product='BUILT_S', resolution=100):
     """Generate JRC FTP URL for a tile"""
-    return f"https://jeodpp.jrc.ec.europa.eu/ftp/jrc-opendata/GHSL/GHS_BUILT_S_GLOBE_R2023A/GHS_BUILT_S_E2030_GLOBE_R2023A_54009_{resolution}/V1-0/GHS_BUILT_S_E2030_GLOBE_R2023A_54009_{resolution}_V1_0_R{row}_C{col}.zip"
+    name = f"{JRC_PRODUCT}_{resolution}"
+    return f"{JRC_URL}/{name}/V1-0/{name}_V1_0_R{row}_C{col}.zip"
 
 def main():
     parser = argparse.ArgumentParser(description='GHSL Tiles Needed Calculator')
     parser.add_argument('--urls', action='store_true', help='Generate download URLs')
     parser.add_argument('--wget', action='store_true', help='Generate wget commands')
     parser.add_argument('--jrc', action='store_true', help='Use JRC URLs instead of Copernicus')
+    parser.add_argument('--numba', action='store_true', help='Enumerate tiles with the numba kernel (large keystone sets)')
     args = parser.parse_args()
     
-    tiles_needed, parks_per_tile = get_tiles_needed()
+    if args.numba and enumerate_tiles is None:
+        print("--numba requires: pip install numba")
+        exit(1)
+    
+    tiles_needed, parks_per_tile = get_tiles_needed(args.numba)
     
     # Currently available tiles
     available = {(9, 22), (8, 20), (8, 21)}  # R9_C22, R8_C20, R8_C21
     missing = tiles_needed - available
+    counts = {tile: len(parks) for tile, parks in parks_per_tile.items()}
     
     print(f"Total tiles needed: {len(tiles_needed)}")
     print(f"Currently available: {len(available)}")
@@ -111,9 +349,11 @@ def main():
         print("# Save files to data/ghsl_tiles/")
         print()
         
+        # Build the whole listing and write it once (it is usually redirected to a file)
+        lines = []
         for row, col in sorted(missing):
             tile_key = f"R{row}_C{col}"
-            park_count = len(parks_per_tile[(row, col)])
+            park_count = counts[(row, col)]
             
             if args.jrc:
                 url = get_jrc_url(row, col)
@@ -121,19 +361,20 @@ def main():
                 url = get_download_url(row, col)
             
             if args.wget:
-                print(f"# {tile_key} ({park_count} parks)")
-                print(f"wget -O data/ghsl_tiles/{tile_key}_BUILT_S.zip '{url}'")
                 # Also need POP data
                 pop_url = url.replace('ds=bu&level=S', 'ds=pop').replace('kw=2018', 'kw=2030')
-                print(f"wget -O data/ghsl_tiles/{tile_key}_POP.zip '{pop_url}'")
-                print()
+                lines.append(f"# {tile_key} ({park_count} parks)\n"
+                             f"wget -O data/ghsl_tiles/{tile_key}_BUILT_S.zip '{url}'\n"
+                             f"wget -O data/ghsl_tiles/{tile_key}_POP.zip '{pop_url}'\n")
             else:
-                print(f"{tile_key}: {url}")
+                lines.append(f"{tile_key}: {url}")
+        if lines:
+            sys.stdout.write("\n".join(lines) + "\n")
     else:
         print("Tiles needed (sorted by park coverage):")
-        for row, col in sorted(tiles_needed, key=lambda t: -len(parks_per_tile[t])):
+        for row, col in sorted(tiles_needed, key=lambda t: -counts[t]):
             tile_key = f"R{row}_C{col}"
-            park_count = len(parks_per_tile[(row, col)])
+            park_count = counts[(row, col)]
             status = "✓" if (row, col) in available else "✗"
             print(f"  {status} {tile_key}: {park_count} parks")
 
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+GHSL ZIP to Zarr Converter
+
+One-time conversion of the GeoTIFFs inside a GHSL ZIP file into chunked Zarr
+arrays. The ZIP layout forces a full decompression of every TIF on each open;
+Zarr stores each tile as independently compressed chunks, so processors can
+read just the window covering a park.
+
+Each TIF becomes a Zarr array under the store, at the TIF's path inside the
+ZIP, with the raster georeferencing kept in the array attributes:
+    transform  - affine coefficients (a, b, c, d, e, f)
+    crs        - WKT string
+    nodata     - nodata value (or null)
+
+ghsl_enhanced_processor.py picks the store up automatically (see --zarr).
+
+Usage:
+    source .venv/bin/activate
+    python scripts/ghsl_to_zarr.py --zip data/ghsl_examples.zip
+    python scripts/ghsl_to_zarr.py --zip data/ghsl_examples.zip --out data/ghsl.zarr --chunk 2048
+"""
+
+import zipfile
+import argparse
+import logging
+from pathlib import Path
+
+try:
+    from rasterio.io import MemoryFile
+    import zarr
+except ImportError as e:
+    print(f"Missing: {e}. Run: pip install rasterio zarr")
+    exit(1)
+
+# Configuration
+BASE_DIR = Path(__file__).parent.parent
+GHSL_ZIP_PATH = BASE_DIR / "data" / "ghsl_examples.zip"
+ZARR_PATH = BASE_DIR / "data" / "ghsl.zarr"
+CHUNK_SIZE = 1024  # Pixels per chunk side
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def convert_tif(zf: zipfile.ZipFile, name: str, out_path: Path, chunk_size: int = CHUNK_SIZE):
+    """Convert a single TIF inside the ZIP to a chunked Zarr array"""
+    with zf.open(name) as f:
+        data = f.read()
+
+    with MemoryFile(data) as memfile:
+        with memfile.open() as src:
+            arr = src.read(1)
+            attrs = {
+                'transform': list(src.transform)[:6],
+                'crs': src.crs.to_wkt() if src.crs else None,
+                'nodata': src.nodata,
+            }
+
+    z = zarr.open_array(str(out_path / name), mode='w', shape=arr.shape,
+                        chunks=(chunk_size, chunk_size), dtype=arr.dtype)
+    z[:] = arr
+    z.attrs.update(attrs)
+    logger.info(f"Converted {name} ({arr.shape[1]}x{arr.shape[0]}, {arr.dtype})")
+
+
+def convert_zip(zip_path: Path, out_path: Path, chunk_size: int = CHUNK_SIZE) -> int:
+    """Convert every TIF in the ZIP, return number of arrays written"""
+    converted = 0
+    with zipfile.ZipFile(zip_path, 'r') as zf:
+        for name in zf.namelist():
+            if not name.endswith('.tif') or name.startswith('__MACOSX'):
+                continue
+            try:
+                convert_tif(zf, name, out_path, chunk_size)
+                converted += 1
+            except Exception as e:
+                logger.error(f"Failed to convert {name}: {e}")
+
+    logger.info(f"Wrote {converted} arrays to {out_path}")
+    return converted
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert GHSL ZIP of GeoTIFFs to Zarr')
+    parser.add_argument('--zip', default=str(GHSL_ZIP_PATH), help='Path to GHSL ZIP file')
+    parser.add_argument('--out', default=str(ZARR_PATH), help='Output Zarr store')
+    parser.add_argument('--chunk', type=int, default=CHUNK_SIZE, help='Chunk size in pixels')
+    args = parser.parse_args()
+
+    convert_zip(Path(args.zip), Path(args.out), args.chunk)
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
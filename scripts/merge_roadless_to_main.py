@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Merge OSM Roadless Results into the Main Database
+
+osm_roadless_analysis.py writes to its own data/osm_roadless.db so its writes
+never contend with the app's db.sqlite3. This copies those rows into the app
+database, replacing any existing row for the same park. The analyzer does this
+at the end of every run; run it by hand after an interrupted run.
+
+Only columns present in both tables are copied, so the app's schema is left as is.
+
+Usage:
+    python scripts/merge_roadless_to_main.py
+    python scripts/merge_roadless_to_main.py --src data/osm_roadless.db --dst db.sqlite3
+"""
+
+import sqlite3
+import argparse
+import logging
+from pathlib import Path
+
+# Configuration
+BASE_DIR = Path(__file__).parent.parent
+SRC_DB_PATH = BASE_DIR / "data" / "osm_roadless.db"
+DST_DB_PATH = BASE_DIR / "db.sqlite3"
+TABLE = "osm_roadless_data"
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def merge(src_path: Path = SRC_DB_PATH, dst_path: Path = DST_DB_PATH) -> int:
+    """Copy the analyzer's rows from src into dst in one transaction, return rows merged"""
+    conn = sqlite3.connect(dst_path, timeout=30)
+    try:
+        conn.execute("ATTACH DATABASE ? AS src", (str(src_path),))
+        src_cols = [row[1] for row in conn.execute(f"PRAGMA src.table_info({TABLE})")]
+        if not src_cols:
+            return 0
+
+        # First merge into a fresh database: create the table with the analyzer's schema
+        create_sql = conn.execute("SELECT sql FROM src.sqlite_master WHERE type = 'table' AND name = ?",
+                                  (TABLE,)).fetchone()[0]
+        if not conn.execute("SELECT 1 FROM main.sqlite_master WHERE type = 'table' AND name = ?",
+                            (TABLE,)).fetchone():
+            conn.execute(create_sql)
+
+        # id is left to the destination; park_id is UNIQUE in both schemas
+        dst_cols = {row[1] for row in conn.execute(f"PRAGMA main.table_info({TABLE})")}
+        cols = ', '.join(c for c in src_cols if c in dst_cols and c != 'id')
+        with conn:
+            cursor = conn.execute(f"INSERT OR REPLACE INTO main.{TABLE} ({cols}) SELECT {cols} FROM src.{TABLE}")
+        return cursor.rowcount
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Merge OSM roadless results into the main database')
+    parser.add_argument('--src', default=str(SRC_DB_PATH), help='Analyzer database')
+    parser.add_argument('--dst', default=str(DST_DB_PATH), help='Main database')
+    args = parser.parse_args()
+
+    merged = merge(Path(args.src), Path(args.dst))
+    logger.info(f"Merged {merged} rows from {args.src} into {args.dst}")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -13,34 +13,89 @@ Usage:
 """
 
 import json
+import gzip
+import atexit
+import hashlib
 import sqlite3
 import time
 import logging
 import argparse
 import requests
 import gc
+import os
+import sys
+import threading
+from collections import deque
+from functools import lru_cache
+from concurrent.futures import (ThreadPoolExecutor, ProcessPoolExecutor, Future,
+                                wait, as_completed, FIRST_COMPLETED)
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timezone
 
 try:
-    from shapely.geometry import shape, LineString, MultiLineString, mapping
-    from shapely.ops import unary_union
+    from shapely.geometry import shape, box, MultiLineString, mapping
+    from shapely.strtree import STRtree
+    import numpy as np
     import pyproj
+    import shapely
     HAS_GEO = True
 except ImportError as e:
     print(f"Missing dependency: {e}")
-    print("Run: source .venv/bin/activate && pip install shapely pyproj")
+    print("Run: source .venv/bin/activate && pip install 'shapely>=2' pyproj")
     HAS_GEO = False
 
+try:
+    from numba import njit, prange  # Optional: grid estimate of roaded area (--raster-cell)
+except ImportError:
+    njit = None
+
+try:
+    import ijson  # Optional: stream-parse Overpass responses instead of buffering them
+    from urllib3.exceptions import HTTPError as Urllib3Error
+    # Raised by a streamed read (dropped connection, read timeout, truncated body);
+    # neither is a requests RequestException
+    STREAM_ERRORS = (Urllib3Error, ijson.JSONError)
+except ImportError:
+    ijson = None
+    STREAM_ERRORS = ()
+
+sys.path.insert(0, str(Path(__file__).parent))
+from merge_roadless_to_main import merge as merge_into_main
+
 # Configuration
 BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "data"
 DB_PATH = BASE_DIR / "db.sqlite3"
+# Results are written here and merged into DB_PATH at the end of each run, so
+# the analyzer's writes never contend with the app for the main database
+ANALYTICS_DB_PATH = DATA_DIR / "osm_roadless.db"
+
+# Applied to the analyzer's connection (journal_mode=WAL is set once in _init_db)
+SQLITE_PRAGMAS = (
+    'PRAGMA synchronous=NORMAL',  # Safe with WAL: no fsync on every commit
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-65536',  # 64 MB page cache
+    'PRAGMA mmap_size=268435456',  # 256 MB memory-mapped I/O
+    'PRAGMA busy_timeout=5000',
+)
+
+# Results are written in batches of this many parks, one transaction each
+SAVE_BATCH_SIZE = 10
 
 # Overpass API endpoint
 OVERPASS_URL = "https://overpass-api.de/api/interpreter"
 
+# Overpass requests in flight at once (the public server allows ~2 slots per IP).
+# Fetching runs this far ahead of the geometry work so the two overlap.
+OVERPASS_CONCURRENCY = 2
+
+# Overpass requests that may go out back to back before the rate limit applies
+REQUEST_BURST = 2
+
+# Decoded Overpass responses, one <sha1(query)>.json.gz per query, reused on reruns
+OVERPASS_CACHE_DIR = DATA_DIR / "overpass_cache"
+
 # Road types to include
 ROAD_TYPES = [
     'motorway', 'motorway_link',
@@ -56,6 +111,17 @@ ROAD_TYPES = [
 # Buffer distance in meters
 ROAD_BUFFER_M = 1000
 
+# Douglas-Peucker tolerance for projected roads before buffering, in meters.
+# OSM ways are sampled every few meters, far finer than a 1 km buffer needs.
+ROAD_SIMPLIFY_M = 50
+
+# Target roads per grid tile when buffering/unioning (n x n tiles, n = sqrt(roads / this))
+ROADS_PER_TILE = 500
+
+# With --raster-cell, parks at least this large get the grid area estimate;
+# smaller ones keep the exact polygon overlay
+RASTER_MIN_AREA_KM2 = 1000
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
@@ -63,20 +129,363 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
+def _utm_transformer(utm_crs: str):
+    """WGS84 -> UTM transformer, built once per zone (building one sets up a PROJ pipeline)"""
+    return pyproj.Transformer.from_crs("EPSG:4326", utm_crs, always_xy=True)
+
+
+def _geodesic_lengths(coords: "np.ndarray", counts: "np.ndarray") -> "np.ndarray":
+    """
+    Geodesic length in meters of each line packed in coords (lon, lat rows),
+    line k being the next counts[k] >= 2 rows, from one pass over all segments
+    """
+    geod = pyproj.Geod(ellps='WGS84')
+    segments = np.asarray(geod.line_lengths(coords[:, 0], coords[:, 1]))
+    ends = np.cumsum(counts)
+    segments[ends[:-1] - 1] = 0  # Segments joining one line to the next
+    return np.add.reduceat(segments, ends - counts)
+
+
+def _ring_arrays(geom) -> Tuple:
+    """All polygon rings of geom as (coords, offsets): ring k is coords[offsets[k]:offsets[k+1]]"""
+    parts = shapely.get_parts(geom)
+    polygons = parts[shapely.get_type_id(parts) == 3]
+    rings = shapely.get_rings(polygons)
+    offsets = np.concatenate([[0], np.cumsum(shapely.get_num_coordinates(rings))])
+    return shapely.get_coordinates(rings), offsets
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _scanline_fill(ring_xy, ring_offsets, x0, y0, cell, nx, ny):
+        """
+        (ny, nx) mask of grid cells whose centers fall inside the rings (even-odd
+        rule, so holes and multipolygons work). Each row intersects every edge
+        with the row's center line once and fills between crossing pairs,
+        instead of ray-casting every cell against every edge.
+        """
+        mask = np.zeros((ny, nx), dtype=np.bool_)
+        n_edges = ring_xy.shape[0]
+        for j in prange(ny):
+            y = y0 + (j + 0.5) * cell
+            crossings = np.empty(n_edges, dtype=np.float64)
+            n = 0
+            for r in range(ring_offsets.shape[0] - 1):
+                for k in range(ring_offsets[r], ring_offsets[r + 1] - 1):
+                    ya = ring_xy[k, 1]
+                    yb = ring_xy[k + 1, 1]
+                    if (ya > y) != (yb > y):
+                        xa = ring_xy[k, 0]
+                        crossings[n] = xa + (y - ya) * (ring_xy[k + 1, 0] - xa) / (yb - ya)
+                        n += 1
+            xs = np.sort(crossings[:n])
+            for m in range(0, n - 1, 2):
+                i0 = max(int(np.ceil((xs[m] - x0) / cell - 0.5)), 0)
+                i1 = min(int(np.floor((xs[m + 1] - x0) / cell - 0.5)), nx - 1)
+                for i in range(i0, i1 + 1):
+                    mask[j, i] = True
+        return mask
+else:
+    _scanline_fill = None
+
+
+def _rasterized_overlap_area(a, b, cell_m: float) -> float:
+    """Area in m² of a ∩ b, estimated by counting cell_m grid cells inside both"""
+    x0, y0, x1, y1 = a.bounds
+    nx = max(1, int(np.ceil((x1 - x0) / cell_m)))
+    ny = max(1, int(np.ceil((y1 - y0) / cell_m)))
+    in_a = _scanline_fill(*_ring_arrays(a), x0, y0, cell_m, nx, ny)
+    in_b = _scanline_fill(*_ring_arrays(b), x0, y0, cell_m, nx, ny)
+    return np.count_nonzero(in_a & in_b) * cell_m * cell_m
+
+
+class RoadlessCalculator:
+    """
+    CPU stage of the analysis: road classification and roaded area of one park
+    from its Overpass data. Holds only settings, so it pickles cheaply into
+    worker processes.
+    """
+    
+    def __init__(self, road_types=None, buffer_m=ROAD_BUFFER_M, simplify_m=ROAD_SIMPLIFY_M, raster_cell_m=None):
+        self.road_types = road_types or ROAD_TYPES
+        self._road_types_set = frozenset(self.road_types)
+        self.buffer_m = buffer_m
+        self.simplify_m = simplify_m
+        self.raster_cell_m = raster_cell_m  # None: always the exact overlay
+        if raster_cell_m and _scanline_fill is None:
+            logger.warning("numba not installed, --raster-cell ignored (pip install numba)")
+            self.raster_cell_m = None
+    
+    def compute(self, park: Dict, osm_data: Optional[Dict]) -> Dict:
+        """Analyze a single park for roadless wilderness, from already fetched Overpass data"""
+        park_id = park['id']
+        park_name = park.get('name', park_id)
+        logger.info(f"Analyzing {park_id} ({park_name})")
+        
+        result = {
+            'park_id': park_id,
+            'total_area_km2': park.get('area_km2'),
+            'roaded_area_km2': None,
+            'roadless_area_km2': None,
+            'roadless_percentage': None,
+            'road_length_km': None,
+            'road_density_km_per_km2': None,
+            'buffer_distance_m': self.buffer_m,
+            'road_types_used': ','.join(self.road_types),
+            'roads_json': None,
+            'buffer_roads_json': None,
+            # When the OSM data was fetched, which for a cached response is not now
+            'osm_query_timestamp': (osm_data or {}).get('fetched_at') or datetime.now(timezone.utc).isoformat(),
+            'error_message': None
+        }
+        
+        geom = park.get('geometry')
+        if not geom:
+            result['error_message'] = "No geometry available"
+            return result
+        
+        try:
+            park_shape = shape(geom)
+            if not park_shape.is_valid:
+                park_shape = park_shape.buffer(0)
+        except Exception as e:
+            result['error_message'] = f"Invalid geometry: {e}"
+            return result
+        
+        # Create buffer zone (10km around park)
+        # Rough conversion: 0.1 degrees ~ 10km
+        buffer_shape = park_shape.buffer(0.1)
+        
+        if not osm_data:
+            result['error_message'] = "Failed to query Overpass API"
+            return result
+        
+        # Extract and classify roads
+        roads_inside, roads_buffer, total_length_km, lines_inside = self._extract_roads_simplified(
+            osm_data, park_shape, buffer_shape
+        )
+        
+        logger.info(f"  Found {len(roads_inside)} roads inside, {len(roads_buffer)} in buffer")
+        
+        # Store road data as JSON (limit size)
+        if len(roads_inside) <= 500:
+            result['roads_json'] = json.dumps(roads_inside)
+        else:
+            # Store summary for large parks
+            result['roads_json'] = json.dumps({
+                'count': len(roads_inside),
+                'sample': roads_inside[:50],
+                'total_length_km': sum(r['length_km'] for r in roads_inside)
+            })
+        
+        if len(roads_buffer) <= 500:
+            result['buffer_roads_json'] = json.dumps(roads_buffer)
+        else:
+            result['buffer_roads_json'] = json.dumps({
+                'count': len(roads_buffer),
+                'sample': roads_buffer[:50],
+                'total_length_km': sum(r['length_km'] for r in roads_buffer)
+            })
+        
+        # Length comes from the WGS84 lines, so it is reported even if the area calculation fails
+        result['road_length_km'] = round(total_length_km, 2)
+        
+        # Calculate roaded area
+        total_area_km2 = park.get('area_km2') or (park_shape.area * 12321)  # rough deg² to km²
+        result['total_area_km2'] = round(total_area_km2, 2)
+        result['road_density_km_per_km2'] = round(total_length_km / total_area_km2, 4) if total_area_km2 > 0 else 0
+        
+        # Determine UTM zone
+        centroid = park_shape.centroid
+        utm_zone = int((centroid.x + 180) / 6) + 1
+        hemisphere = 'north' if centroid.y >= 0 else 'south'
+        utm_crs = f"EPSG:{32600 + utm_zone if hemisphere == 'north' else 32700 + utm_zone}"
+        
+        try:
+            roaded_area_km2 = self._calculate_roaded_area_chunked(lines_inside, park_shape, utm_crs)
+            result['roaded_area_km2'] = round(roaded_area_km2, 2)
+            result['roadless_area_km2'] = round(total_area_km2 - roaded_area_km2, 2)
+            result['roadless_percentage'] = round((total_area_km2 - roaded_area_km2) / total_area_km2 * 100, 1) if total_area_km2 > 0 else 0
+            
+            logger.info(f"  Roadless: {result['roadless_percentage']}% ({result['roadless_area_km2']} km²)")
+            
+        except Exception as e:
+            result['error_message'] = f"Area calculation failed: {e}"
+            logger.warning(f"  Error: {e}")
+        
+        # Clean up
+        del osm_data, roads_inside, roads_buffer, lines_inside
+        gc.collect()
+        
+        return result
+    
+    def _extract_roads_simplified(self, osm_data: Dict, park_shape, buffer_shape) -> Tuple[List, List, float, List]:
+        """
+        Extract roads as simplified GeoJSON, separating inside park vs buffer.
+        Returns (roads_inside, roads_buffer, total_length_km, lines_inside), where
+        lines_inside are the full-resolution WGS84 lines of roads_inside.
+        """
+        roads_inside = []
+        roads_buffer = []
+        lines_inside = []
+        total_length_km = 0
+        
+        # Pack every way's vertices into flat arrays and build all lines in one call
+        # Overpass returns every highway way; road types are picked here
+        ways = [e for e in osm_data.get('elements', [])
+                if e.get('type') == 'way' and len(e.get('geometry', [])) >= 2
+                and e.get('tags', {}).get('highway') in self._road_types_set]
+        if not ways:
+            return roads_inside, roads_buffer, total_length_km, lines_inside
+        
+        counts = np.array([len(e['geometry']) for e in ways])
+        coords = np.array([(pt['lon'], pt['lat']) for e in ways for pt in e['geometry']], dtype=np.float64)
+        lines = shapely.linestrings(coords, indices=np.repeat(np.arange(len(ways)), counts))
+        
+        # Simplify to reduce memory (tolerance ~100m in degrees)
+        simple = shapely.simplify(lines, 0.001, preserve_topology=True)
+        simple_coords = np.split(shapely.get_coordinates(simple),
+                                 np.cumsum(shapely.get_num_coordinates(simple))[:-1])
+        
+        # Use geodesic length, of the full-resolution lines
+        lengths_km = _geodesic_lengths(coords, counts) / 1000
+        total_length_km = float(lengths_km.sum())
+        roads = []
+        for element, line_coords, length_km in zip(ways, simple_coords, lengths_km.tolist()):
+            roads.append({
+                'type': element.get('tags', {}).get('highway', 'unknown'),
+                'coords': line_coords.tolist(),
+                'length_km': round(length_km, 3)
+            })
+        
+        # Classify roads with one index query per shape: the STRtree prunes by
+        # bbox and only the candidates get the exact (prepared) intersects test
+        tree = STRtree(lines)
+        inside = np.zeros(len(lines), dtype=bool)
+        inside[tree.query(park_shape, predicate='intersects')] = True
+        near = np.zeros(len(lines), dtype=bool)
+        near[tree.query(buffer_shape, predicate='intersects')] = True
+        
+        for road_data, is_inside, is_near in zip(roads, inside.tolist(), near.tolist()):
+            if is_inside:
+                roads_inside.append(road_data)
+            elif is_near:
+                roads_buffer.append(road_data)
+        
+        return roads_inside, roads_buffer, total_length_km, list(lines[inside])
+    
+    def _calculate_roaded_area_chunked(self, lines: List, park_shape, utm_crs: str) -> float:
+        """
+        Calculate roaded area by buffering roads tile by tile (see _tiled_buffer_union).
+        lines are the raw WGS84 road lines; they are reprojected before any
+        simplification so it happens once, in meters. Returns roaded area in km².
+        """
+        if not lines:
+            return 0.0
+        
+        # Project to UTM: park rings and all road vertices as arrays, one call each
+        transformer_to_utm = _utm_transformer(utm_crs)
+        
+        def project(xy):
+            return np.column_stack(transformer_to_utm.transform(xy[:, 0], xy[:, 1]))
+        
+        park_utm = shapely.transform(park_shape, project)
+        
+        lines_utm = shapely.transform(np.array(lines, dtype=object), project)
+        
+        # Buffer cost scales with vertex count; topology doesn't matter for a buffer
+        if self.simplify_m:
+            lines_utm = shapely.simplify(lines_utm, self.simplify_m, preserve_topology=False)
+        lines_utm = lines_utm[~shapely.is_empty(lines_utm)]
+        if len(lines_utm) == 0:
+            return 0.0
+        
+        # Large parks can skip the polygon overlay: estimate it on a grid instead
+        if self.raster_cell_m and park_utm.area >= RASTER_MIN_AREA_KM2 * 1_000_000:
+            road_buffer = self._tiled_buffer_union(lines_utm, park_utm.bounds, self.buffer_m)
+            return _rasterized_overlap_area(park_utm, road_buffer, self.raster_cell_m) / 1_000_000
+        
+        # Sort roads by where their buffer can fall: not on the park at all (dropped),
+        # entirely inside it (more than buffer_m from the boundary, so no clip needed)
+        # or across the boundary (clipped). Both shapes are prepared for the bulk tests.
+        outer = park_utm.buffer(self.buffer_m)
+        inner = park_utm.buffer(-self.buffer_m)
+        shapely.prepare(outer)
+        shapely.prepare(inner)
+        lines_utm = lines_utm[~shapely.disjoint(outer, lines_utm)]
+        interior = shapely.contains(inner, lines_utm)
+        
+        parts = []
+        if interior.any():
+            parts.append(self._tiled_buffer_union(lines_utm[interior], park_utm.bounds, self.buffer_m))
+        if not interior.all():
+            edge = self._tiled_buffer_union(lines_utm[~interior], park_utm.bounds, self.buffer_m)
+            parts.append(shapely.intersection(edge, park_utm))
+        total_roaded = shapely.union_all(parts)
+        
+        if total_roaded is None or total_roaded.is_empty:
+            return 0.0
+        
+        return total_roaded.area / 1_000_000  # m² to km²
+    
+    def _tiled_buffer_union(self, lines: "np.ndarray", bounds: Tuple[float, float, float, float], buffer_m: float):
+        """
+        Union of the lines' buffers within bounds, computed on an n x n tile grid.
+        
+        Buffer and union cost grows faster than the vertex count, so many small
+        overlays beat one large one. Each tile buffers only the lines clipped to
+        the tile grown by buffer_m (everything that can reach it), unions those
+        buffers and keeps the part inside the tile, so the pieces meet without
+        seams or overlaps.
+        """
+        n = max(1, int((len(lines) / ROADS_PER_TILE) ** 0.5))
+        tree = STRtree(lines)
+        xs = np.linspace(bounds[0], bounds[2], n + 1)
+        ys = np.linspace(bounds[1], bounds[3], n + 1)
+        
+        pieces = []
+        for i in range(n):
+            for j in range(n):
+                tile = box(xs[i], ys[j], xs[i + 1], ys[j + 1])
+                reach = (xs[i] - buffer_m, ys[j] - buffer_m, xs[i + 1] + buffer_m, ys[j + 1] + buffer_m)
+                candidates = tree.query(box(*reach))
+                if len(candidates) == 0:
+                    continue
+                # clip_by_rect rather than intersection: it does not node self-crossing
+                # roads into many parts, which would make the buffers much slower
+                # quad_segs=16 is the .buffer() method default (the function's is 8)
+                buffers = shapely.buffer(shapely.clip_by_rect(lines[candidates], *reach), buffer_m, quad_segs=16)
+                pieces.append(shapely.intersection(shapely.union_all(buffers), tile))
+        
+        return shapely.union_all(pieces)
+
+
 class OSMRoadlessAnalyzer:
     """Memory-efficient roadless wilderness analyzer"""
     
-    def __init__(self, db_path=DB_PATH, road_types=None, buffer_m=ROAD_BUFFER_M):
+    def __init__(self, db_path=ANALYTICS_DB_PATH, road_types=None, buffer_m=ROAD_BUFFER_M, simplify_m=ROAD_SIMPLIFY_M,
+                 raster_cell_m=None):
         self.db_path = db_path
         self.road_types = road_types or ROAD_TYPES
         self.buffer_m = buffer_m
+        self.calculator = RoadlessCalculator(self.road_types, buffer_m, simplify_m, raster_cell_m)
         self.keystones = self._load_keystones()
         self._init_db()
-        
-        # Rate limiting
-        self.last_request_time = 0
-        self.min_request_interval = 5
+        self._pending_rows = []
+        # Results queued but not yet in the database, one JSON line per park, so a
+        # crash between batch writes loses nothing (see _recover_json_results)
+        db_path = Path(db_path)
+        self.json_results_path = db_path.with_name(f"{db_path.stem}_results.jsonl.gz")
+        self._recover_json_results()
+        atexit.register(self.flush_results)  # Runs before the connection is closed
+        
+        # Rate limiting: token bucket shared by the fetch threads, refilled at one
+        # request per park_sleep_interval and holding up to REQUEST_BURST
         self.park_sleep_interval = 30
+        self._bucket_tokens = float(REQUEST_BURST)
+        self._bucket_last = time.monotonic()
+        self._rate_lock = threading.Lock()
         self.progress_file = DATA_DIR / "osm_roadless_progress.json"
     
     def _load_keystones(self) -> List[Dict]:
@@ -89,9 +498,14 @@ class OSMRoadlessAnalyzer:
         return []
     
     def _init_db(self):
-        """Initialize database tables"""
-        conn = sqlite3.connect(self.db_path, timeout=30)
-        cursor = conn.cursor()
+        """Open the analyzer's database connection and initialize tables"""
+        # One connection for the whole run, closed at exit
+        self._conn = sqlite3.connect(self.db_path, timeout=30)
+        for pragma in SQLITE_PRAGMAS:
+            self._conn.execute(pragma)
+        atexit.register(self._conn.close)
+        
+        cursor = self._conn.cursor()
         cursor.execute("PRAGMA journal_mode=WAL")
         
         # Add roads_json column if not exists
@@ -124,21 +538,31 @@ class OSMRoadlessAnalyzer:
             pass
         
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_osm_roadless_park_id ON osm_roadless_data(park_id)")
-        conn.commit()
-        conn.close()
+        self._conn.commit()
         logger.info("Database initialized")
     
-    def _get_processed_parks(self) -> set:
-        """Get set of already processed park IDs"""
+    def _get_processed_parks(self, park_ids: List[str]) -> set:
+        """Get set of park_ids already processed, from this database and the main one"""
+        # The unique park_id index does the matching; only hits come back
+        query = ("SELECT park_id FROM osm_roadless_data WHERE error_message IS NULL "
+                 f"AND park_id IN ({','.join('?' * len(park_ids))})")
+        processed = set()
         try:
-            conn = sqlite3.connect(self.db_path, timeout=5)
-            cursor = conn.cursor()
-            cursor.execute("SELECT park_id FROM osm_roadless_data WHERE error_message IS NULL")
-            result = set(row[0] for row in cursor.fetchall())
-            conn.close()
-            return result
+            processed.update(row[0] for row in self._conn.execute(query, park_ids))
         except Exception:
-            return set()
+            pass
+        
+        # Results merged by earlier runs (or written before the analyzer had its own database)
+        if Path(self.db_path) != DB_PATH and DB_PATH.exists():
+            try:
+                conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True, timeout=30)
+                try:
+                    processed.update(row[0] for row in conn.execute(query, park_ids))
+                finally:
+                    conn.close()
+            except Exception:
+                pass
+        return processed
     
     def _get_park_bbox(self, park: Dict) -> Tuple[float, float, float, float]:
         """Get bounding box (min_lon, min_lat, max_lon, max_lat)"""
@@ -156,45 +580,80 @@ class OSMRoadlessAnalyzer:
         return (bounds[0] - buffer_deg, bounds[1] - buffer_deg, 
                 bounds[2] + buffer_deg, bounds[3] + buffer_deg)
     
-    def _query_overpass(self, bbox: Tuple[float, float, float, float], retries: int = 3) -> Optional[Dict]:
-        """Query Overpass API for roads"""
+    def _road_filter(self, bbox: Tuple[float, float, float, float], by_type: bool = True) -> str:
+        """
+        Overpass statement selecting the road ways in bbox, or with by_type=False
+        every highway way. The geometry fetch uses the latter and filters road
+        types client-side, so one cached response serves any set of them.
+        """
         min_lon, min_lat, max_lon, max_lat = bbox
-        
-        # Build highway filter
+        if not by_type:
+            return f'way["highway"]({min_lat},{min_lon},{max_lat},{max_lon});'
         highway_filter = '|'.join(self.road_types)
-        
+        return f'way["highway"~"^({highway_filter})$"]({min_lat},{min_lon},{max_lat},{max_lon});'
+    
+    def _query_overpass(self, bbox: Tuple[float, float, float, float], retries: int = 3) -> Optional[Dict]:
+        """Query Overpass API for roads"""
         # Overpass query - get ways only, not full geometry
         query = f"""
         [out:json][timeout:180];
         (
-          way["highway"~"^({highway_filter})$"]({min_lat},{min_lon},{max_lat},{max_lon});
+          {self._road_filter(bbox, by_type=False)}
         );
         out geom;
         """
         
+        # Served from disk: no request, so no rate-limit wait either
+        query_hash = hashlib.sha1(query.encode()).hexdigest()
+        cached = self._overpass_cache_get(query_hash)
+        if cached is not None:
+            logger.info("  Using cached Overpass response")
+            return cached
+        
+        # A zero count is cached under the probe's own query, which names the road
+        # types. The geometry query above is shared by every set of road types, so
+        # an empty result must never be stored under it.
+        probe_hash = hashlib.sha1(self._count_query(bbox).encode()).hexdigest()
+        cached = self._overpass_cache_get(probe_hash)
+        if cached is not None:
+            logger.info("  No roads in bbox (cached count)")
+            return cached
+        
+        # One token covers the park: the count probe and the first fetch attempt
+        # that follows it (retries take their own)
+        self._acquire_request_slot()
+        
+        # Roadless bbox: skip the geometry download
+        if self._probe_overpass_count(bbox) == 0:
+            logger.info("  No roads in bbox")
+            data = {'elements': [], 'fetched_at': datetime.now(timezone.utc).isoformat()}
+            self._overpass_cache_put(probe_hash, data)
+            return data
+        
         for attempt in range(1, retries + 1):
-            # Rate limit
-            elapsed = time.time() - self.last_request_time
-            if elapsed < self.min_request_interval:
-                time.sleep(self.min_request_interval - elapsed)
-            
+            if attempt > 1:
+                self._acquire_request_slot()
             logger.info(f"  Querying Overpass API (attempt {attempt}/{retries})...")
             
             try:
-                self.last_request_time = time.time()
                 resp = requests.post(
                     OVERPASS_URL,
                     data={'data': query},
-                    timeout=200
+                    timeout=200,
+                    stream=ijson is not None
                 )
                 
                 if resp.status_code == 429:  # Too many requests
+                    resp.close()  # Streamed responses hold their connection until closed
                     logger.warning("  Rate limited, waiting 60s...")
                     time.sleep(60)
                     continue
                 
                 resp.raise_for_status()
-                return resp.json()
+                data = self._read_overpass_response(resp)
+                data['fetched_at'] = datetime.now(timezone.utc).isoformat()
+                self._overpass_cache_put(query_hash, data)
+                return data
                 
             except requests.exceptions.Timeout:
                 logger.warning(f"  Timeout on attempt {attempt}")
@@ -202,257 +661,184 @@ class OSMRoadlessAnalyzer:
             except requests.exceptions.RequestException as e:
                 logger.warning(f"  Request error: {e}")
                 time.sleep(10)
+            except STREAM_ERRORS as e:
+                resp.close()
+                logger.warning(f"  Response cut short: {e!r}")
+                time.sleep(10)
         
         return None
     
-    def _extract_roads_simplified(self, osm_data: Dict, park_shape, buffer_shape) -> Tuple[List, List, float]:
-        """
-        Extract roads as simplified GeoJSON, separating inside park vs buffer.
-        Returns (roads_inside, roads_buffer, total_length_km)
-        """
-        roads_inside = []
-        roads_buffer = []
-        total_length_km = 0
-        
-        for element in osm_data.get('elements', []):
-            if element.get('type') != 'way':
-                continue
-            
-            geom = element.get('geometry', [])
-            if len(geom) < 2:
-                continue
-            
-            coords = [(pt['lon'], pt['lat']) for pt in geom]
-            
-            try:
-                line = LineString(coords)
-                
-                # Simplify to reduce memory (tolerance ~100m in degrees)
-                line_simple = line.simplify(0.001, preserve_topology=True)
-                
-                # Use geodesic length
-                geod = pyproj.Geod(ellps='WGS84')
-                length_m = geod.geometry_length(line)
-                total_length_km += length_m / 1000
-                
-                # Classify road
-                road_data = {
-                    'type': element.get('tags', {}).get('highway', 'unknown'),
-                    'coords': list(line_simple.coords),
-                    'length_km': round(length_m / 1000, 3)
-                }
-                
-                if park_shape.intersects(line):
-                    roads_inside.append(road_data)
-                elif buffer_shape.intersects(line):
-                    roads_buffer.append(road_data)
-                    
-            except Exception:
-                continue
-        
-        return roads_inside, roads_buffer, total_length_km
+    def _count_query(self, bbox: Tuple[float, float, float, float]) -> str:
+        """Overpass query counting the road ways (of self.road_types) in bbox"""
+        return f"[out:json][timeout:60];{self._road_filter(bbox)}out count;"
     
-    def _calculate_roaded_area_chunked(self, roads: List[Dict], park_shape, utm_crs: str) -> float:
+    def _probe_overpass_count(self, bbox: Tuple[float, float, float, float]) -> Optional[int]:
         """
-        Calculate roaded area in chunks to save memory.
-        Returns roaded area in km².
+        Number of road ways in bbox from a cheap `out count;` query, None if it fails.
+        Sent on the token _query_overpass takes for the park, not one of its own.
         """
-        if not roads:
-            return 0.0
-        
-        from shapely.geometry import Polygon
-        
-        # Project to UTM
-        transformer_to_utm = pyproj.Transformer.from_crs("EPSG:4326", utm_crs, always_xy=True)
-        
-        # Project park (handle both Polygon and MultiPolygon)
-        from shapely.geometry import MultiPolygon
-        
-        def project_polygon(poly, transformer):
-            exterior_coords = [transformer.transform(x, y) for x, y in poly.exterior.coords]
-            interior_coords = [[transformer.transform(x, y) for x, y in ring.coords] for ring in poly.interiors]
-            return Polygon(exterior_coords, interior_coords)
-        
-        if isinstance(park_shape, MultiPolygon):
-            projected_polys = [project_polygon(poly, transformer_to_utm) for poly in park_shape.geoms]
-            park_utm = MultiPolygon(projected_polys)
-        else:
-            park_utm = project_polygon(park_shape, transformer_to_utm)
-        
-        # Process roads in chunks of 100
-        chunk_size = 100
-        total_roaded = None
-        
-        for i in range(0, len(roads), chunk_size):
-            chunk = roads[i:i+chunk_size]
-            
-            buffers = []
-            for road in chunk:
-                try:
-                    coords = road['coords']
-                    utm_coords = [transformer_to_utm.transform(x, y) for x, y in coords]
-                    line_utm = LineString(utm_coords)
-                    buffers.append(line_utm.buffer(self.buffer_m))
-                except Exception:
-                    continue
-            
-            if buffers:
-                chunk_union = unary_union(buffers)
-                chunk_clipped = chunk_union.intersection(park_utm)
-                
-                if total_roaded is None:
-                    total_roaded = chunk_clipped
-                else:
-                    total_roaded = total_roaded.union(chunk_clipped)
-            
-            # Clean up
-            del buffers
-            gc.collect()
-        
-        if total_roaded is None or total_roaded.is_empty:
-            return 0.0
-        
-        return total_roaded.area / 1_000_000  # m² to km²
+        try:
+            resp = requests.post(OVERPASS_URL, data={'data': self._count_query(bbox)}, timeout=90)
+            resp.raise_for_status()
+            return int(resp.json()['elements'][0]['tags']['ways'])
+        except (requests.exceptions.RequestException, ValueError, KeyError, IndexError) as e:
+            logger.warning(f"  Count probe failed, fetching geometry anyway: {e}")
+            return None
+    
+    def _acquire_request_slot(self):
+        """Take a token from the request bucket, sleeping until one is available"""
+        with self._rate_lock:
+            now = time.monotonic()
+            refill = (now - self._bucket_last) / self.park_sleep_interval
+            self._bucket_tokens = min(REQUEST_BURST, self._bucket_tokens + refill)
+            self._bucket_last = now
+            if self._bucket_tokens < 1:
+                time.sleep((1 - self._bucket_tokens) * self.park_sleep_interval)
+                self._bucket_tokens = 1.0
+                self._bucket_last = time.monotonic()
+            self._bucket_tokens -= 1
+    
+    def _read_overpass_response(self, resp) -> Dict:
+        """Decode an Overpass response; with ijson, elements are parsed as they arrive"""
+        if ijson is None:
+            return resp.json()
+        
+        # Never hold the raw body, and keep only the fields used downstream
+        # (drops per-way node id lists and bounds)
+        resp.raw.decode_content = True
+        elements = [{k: e[k] for k in ('type', 'tags', 'geometry') if k in e}
+                    for e in ijson.items(resp.raw, 'elements.item', use_float=True)]
+        return {'elements': elements}
+    
+    def _overpass_cache_get(self, query_hash: str) -> Optional[Dict]:
+        """Load a cached Overpass response, or None if not cached"""
+        path = OVERPASS_CACHE_DIR / f"{query_hash}.json.gz"
+        if not path.exists():
+            return None
+        try:
+            with gzip.open(path, 'rt') as f:
+                data = json.load(f)
+            # Cached before fetch times were stored: the file was written right after the fetch
+            if 'fetched_at' not in data:
+                data['fetched_at'] = datetime.fromtimestamp(path.stat().st_mtime, timezone.utc).isoformat()
+            return data
+        except (OSError, ValueError) as e:
+            logger.warning(f"  Ignoring unreadable cache file {path.name}: {e}")
+            return None
+    
+    def _overpass_cache_put(self, query_hash: str, data: Dict):
+        """Store an Overpass response; written to a temp file first so readers never see a partial one"""
+        try:
+            OVERPASS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            path = OVERPASS_CACHE_DIR / f"{query_hash}.json.gz"
+            tmp = path.with_suffix('.tmp')
+            with gzip.open(tmp, 'wt') as f:
+                json.dump(data, f)
+            tmp.replace(path)
+        except OSError as e:
+            logger.warning(f"  Could not cache Overpass response: {e}")
+    
+    def _fetch_osm(self, park: Dict) -> Optional[Dict]:
+        """Network stage of analyze_park: Overpass roads around the park, None if unavailable"""
+        if not park.get('geometry'):
+            return None
+        return self._query_overpass(self._get_park_bbox(park))
     
     def analyze_park(self, park: Dict) -> Dict:
         """Analyze a single park for roadless wilderness"""
-        park_id = park['id']
-        park_name = park.get('name', park_id)
-        logger.info(f"Analyzing {park_id} ({park_name})")
-        
-        result = {
-            'park_id': park_id,
-            'total_area_km2': park.get('area_km2'),
-            'roaded_area_km2': None,
-            'roadless_area_km2': None,
-            'roadless_percentage': None,
-            'road_length_km': None,
-            'road_density_km_per_km2': None,
-            'buffer_distance_m': self.buffer_m,
-            'road_types_used': ','.join(self.road_types),
-            'roads_json': None,
-            'buffer_roads_json': None,
-            'osm_query_timestamp': datetime.now(timezone.utc).isoformat(),
-            'error_message': None
-        }
-        
-        geom = park.get('geometry')
-        if not geom:
-            result['error_message'] = "No geometry available"
-            return result
-        
+        return self.calculator.compute(park, self._fetch_osm(park))
+    
+    def save_result(self, result: Dict):
+        """Queue result for the database, writing every SAVE_BATCH_SIZE parks"""
+        self._append_json_result(result)
+        self._queue_result(result)
+        if len(self._pending_rows) >= SAVE_BATCH_SIZE:
+            self.flush_results()
+    
+    def _queue_result(self, result: Dict):
+        """Queue result as a database row for the next flush_results"""
+        self._pending_rows.append((
+            result['park_id'],
+            result['total_area_km2'],
+            result['roaded_area_km2'],
+            result['roadless_area_km2'],
+            result['roadless_percentage'],
+            result['road_length_km'],
+            result['road_density_km_per_km2'],
+            result['buffer_distance_m'],
+            result['road_types_used'],
+            result['roads_json'],
+            result['buffer_roads_json'],
+            result['osm_query_timestamp'],
+            result['error_message']
+        ))
+    
+    def _append_json_result(self, result: Dict):
+        """Log one result; each call appends a gzip member, so it never rewrites the file"""
         try:
-            park_shape = shape(geom)
-            if not park_shape.is_valid:
-                park_shape = park_shape.buffer(0)
-        except Exception as e:
-            result['error_message'] = f"Invalid geometry: {e}"
-            return result
-        
-        # Create buffer zone (10km around park)
-        # Rough conversion: 0.1 degrees ~ 10km
-        buffer_shape = park_shape.buffer(0.1)
-        
-        # Get bounding box and query roads
-        bbox = self._get_park_bbox(park)
-        osm_data = self._query_overpass(bbox)
-        
-        if not osm_data:
-            result['error_message'] = "Failed to query Overpass API"
-            return result
-        
-        # Extract and classify roads
-        roads_inside, roads_buffer, total_length_km = self._extract_roads_simplified(
-            osm_data, park_shape, buffer_shape
-        )
-        
-        logger.info(f"  Found {len(roads_inside)} roads inside, {len(roads_buffer)} in buffer")
-        
-        # Store road data as JSON (limit size)
-        if len(roads_inside) <= 500:
-            result['roads_json'] = json.dumps(roads_inside)
-        else:
-            # Store summary for large parks
-            result['roads_json'] = json.dumps({
-                'count': len(roads_inside),
-                'sample': roads_inside[:50],
-                'total_length_km': sum(r['length_km'] for r in roads_inside)
-            })
-        
-        if len(roads_buffer) <= 500:
-            result['buffer_roads_json'] = json.dumps(roads_buffer)
-        else:
-            result['buffer_roads_json'] = json.dumps({
-                'count': len(roads_buffer),
-                'sample': roads_buffer[:50],
-                'total_length_km': sum(r['length_km'] for r in roads_buffer)
-            })
-        
-        result['road_length_km'] = round(total_length_km, 2)
-        
-        # Calculate roaded area
-        total_area_km2 = park.get('area_km2') or (park_shape.area * 12321)  # rough deg² to km²
-        result['total_area_km2'] = round(total_area_km2, 2)
-        
-        # Determine UTM zone
-        centroid = park_shape.centroid
-        utm_zone = int((centroid.x + 180) / 6) + 1
-        hemisphere = 'north' if centroid.y >= 0 else 'south'
-        utm_crs = f"EPSG:{32600 + utm_zone if hemisphere == 'north' else 32700 + utm_zone}"
-        
+            with gzip.open(self.json_results_path, 'at') as f:
+                f.write(json.dumps(result) + '\n')
+        except OSError as e:
+            logger.warning(f"Could not log result for {result['park_id']}: {e}")
+    
+    def _load_json_results(self) -> Dict[str, Dict]:
+        """Logged results, the last one for each park_id"""
+        results = {}
+        if not self.json_results_path.exists():
+            return results
         try:
-            roaded_area_km2 = self._calculate_roaded_area_chunked(roads_inside, park_shape, utm_crs)
-            result['roaded_area_km2'] = round(roaded_area_km2, 2)
-            result['roadless_area_km2'] = round(total_area_km2 - roaded_area_km2, 2)
-            result['roadless_percentage'] = round((total_area_km2 - roaded_area_km2) / total_area_km2 * 100, 1) if total_area_km2 > 0 else 0
-            result['road_density_km_per_km2'] = round(total_length_km / total_area_km2, 4) if total_area_km2 > 0 else 0
-            
-            logger.info(f"  Roadless: {result['roadless_percentage']}% ({result['roadless_area_km2']} km²)")
-            
-        except Exception as e:
-            result['error_message'] = f"Area calculation failed: {e}"
-            logger.warning(f"  Error: {e}")
-        
-        # Clean up
-        del osm_data, roads_inside, roads_buffer
-        gc.collect()
-        
-        return result
+            with gzip.open(self.json_results_path, 'rt') as f:
+                for line in f:
+                    result = json.loads(line)
+                    results[result['park_id']] = result
+        except (OSError, EOFError, ValueError):
+            pass  # Tail cut short by a crash mid-write; keep what was read
+        return results
     
-    def save_result(self, result: Dict):
-        """Save result to database"""
+    def _recover_json_results(self):
+        """Write results logged by a run that stopped before saving them"""
+        results = self._load_json_results()
+        if results:
+            logger.info(f"Recovering {len(results)} unsaved results from {self.json_results_path.name}")
+            for result in results.values():
+                self._queue_result(result)
+            self.flush_results()
+    
+    def flush_results(self):
+        """Write queued results in a single transaction"""
+        if not self._pending_rows:
+            return
+        rows, self._pending_rows = self._pending_rows, []
         try:
-            conn = sqlite3.connect(self.db_path, timeout=30)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT OR REPLACE INTO osm_roadless_data (
-                    park_id, total_area_km2, roaded_area_km2, roadless_area_km2,
-                    roadless_percentage, road_length_km, road_density_km_per_km2,
-                    buffer_distance_m, road_types_used, roads_json, buffer_roads_json,
-                    osm_query_timestamp, processed_at, error_message
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?)
-            """, (
-                result['park_id'],
-                result['total_area_km2'],
-                result['roaded_area_km2'],
-                result['roadless_area_km2'],
-                result['roadless_percentage'],
-                result['road_length_km'],
-                result['road_density_km_per_km2'],
-                result['buffer_distance_m'],
-                result['road_types_used'],
-                result['roads_json'],
-                result['buffer_roads_json'],
-                result['osm_query_timestamp'],
-                result['error_message']
-            ))
-            
-            conn.commit()
-            conn.close()
+            # Upsert (SQLite >= 3.24): a re-analyzed park keeps its row and id
+            with self._conn:
+                self._conn.executemany("""
+                    INSERT INTO osm_roadless_data (
+                        park_id, total_area_km2, roaded_area_km2, roadless_area_km2,
+                        roadless_percentage, road_length_km, road_density_km_per_km2,
+                        buffer_distance_m, road_types_used, roads_json, buffer_roads_json,
+                        osm_query_timestamp, processed_at, error_message
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?)
+                    ON CONFLICT(park_id) DO UPDATE SET
+                        total_area_km2 = excluded.total_area_km2,
+                        roaded_area_km2 = excluded.roaded_area_km2,
+                        roadless_area_km2 = excluded.roadless_area_km2,
+                        roadless_percentage = excluded.roadless_percentage,
+                        road_length_km = excluded.road_length_km,
+                        road_density_km_per_km2 = excluded.road_density_km_per_km2,
+                        buffer_distance_m = excluded.buffer_distance_m,
+                        road_types_used = excluded.road_types_used,
+                        roads_json = excluded.roads_json,
+                        buffer_roads_json = excluded.buffer_roads_json,
+                        osm_query_timestamp = excluded.osm_query_timestamp,
+                        processed_at = excluded.processed_at,
+                        error_message = excluded.error_message
+                """, rows)
+            # Everything logged is in the database now
+            self.json_results_path.unlink(missing_ok=True)
             
         except Exception as e:
-            logger.error(f"Failed to save result: {e}")
+            logger.error(f"Failed to save {len(rows)} results: {e}")
     
     def _save_progress(self, current: int, total: int, last_park: str):
         """Save progress for monitoring"""
@@ -469,7 +855,8 @@ class OSMRoadlessAnalyzer:
         except Exception:
             pass
     
-    def run_analysis(self, park_id: str = None, limit: int = None, skip_processed: bool = True):
+    def run_analysis(self, park_id: str = None, limit: int = None, skip_processed: bool = True,
+                     workers: int = 1):
         """Run roadless analysis on parks"""
         if not HAS_GEO:
             logger.error("Missing required libraries (shapely, pyproj)")
@@ -484,7 +871,7 @@ class OSMRoadlessAnalyzer:
                 return
         
         if skip_processed:
-            processed = self._get_processed_parks()
+            processed = self._get_processed_parks([p['id'] for p in parks])
             original_count = len(parks)
             parks = [p for p in parks if p['id'] not in processed]
             logger.info(f"Skipping {original_count - len(parks)} already processed parks")
@@ -493,44 +880,110 @@ class OSMRoadlessAnalyzer:
             parks = parks[:limit]
         
         logger.info(f"Analyzing {len(parks)} parks")
-        logger.info(f"Estimated time: {len(parks) * self.park_sleep_interval / 3600:.1f} hours")
+        # One rate-limit slot per uncached park (its count probe and fetch share it),
+        # after the first REQUEST_BURST which go out at once
+        slots = max(0, len(parks) - REQUEST_BURST)
+        logger.info(f"Estimated time: {slots * self.park_sleep_interval / 3600:.1f} hours")
         
         self._save_progress(0, len(parks), "starting")
         
-        for i, park in enumerate(parks, 1):
-            logger.info(f"Progress: {i}/{len(parks)}")
+        # Fetch threads stay OVERPASS_CONCURRENCY parks ahead (rate limits still
+        # apply inside _query_overpass). The geometry work runs in worker processes,
+        # or one background thread, and results are saved as they complete.
+        if workers > 1:
+            computer = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                           initargs=(self.calculator,))
+            compute = _compute_one
+        else:
+            computer = ThreadPoolExecutor(max_workers=1)
+            compute = self.calculator.compute
+        
+        with ThreadPoolExecutor(max_workers=OVERPASS_CONCURRENCY) as fetcher, computer:
+            pending = deque()
+            upcoming = iter(parks)
             
-            try:
-                result = self.analyze_park(park)
-                self.save_result(result)
-                self._save_progress(i, len(parks), park['id'])
-                
-            except Exception as e:
-                logger.error(f"Failed to analyze {park['id']}: {e}")
-                self.save_result({
-                    'park_id': park['id'],
-                    'total_area_km2': None,
-                    'roaded_area_km2': None,
-                    'roadless_area_km2': None,
-                    'roadless_percentage': None,
-                    'road_length_km': None,
-                    'road_density_km_per_km2': None,
-                    'buffer_distance_m': self.buffer_m,
-                    'road_types_used': ','.join(self.road_types),
-                    'roads_json': None,
-                    'buffer_roads_json': None,
-                    'osm_query_timestamp': datetime.now(timezone.utc).isoformat(),
-                    'error_message': str(e)
-                })
+            def fetch_next():
+                park = next(upcoming, None)
+                if park is not None:
+                    pending.append((park, fetcher.submit(self._fetch_osm, park)))
+            
+            computing = {}
+            finished = 0
             
-            # Force garbage collection
-            gc.collect()
+            def save_finished(futures):
+                nonlocal finished
+                for future in futures:
+                    finished += 1
+                    self._save_computed(computing.pop(future), future, finished, len(parks))
             
-            # Sleep between parks
-            if i < len(parks):
-                time.sleep(self.park_sleep_interval)
+            for _ in range(OVERPASS_CONCURRENCY):
+                fetch_next()
+            
+            while pending:
+                park, fetch = pending.popleft()
+                fetch_next()
+                try:
+                    future = computer.submit(compute, park, fetch.result())
+                except Exception as e:
+                    future = Future()
+                    future.set_exception(e)
+                computing[future] = park
+                
+                if len(computing) >= workers:
+                    done, _ = wait(computing, return_when=FIRST_COMPLETED)
+                    save_finished(done)
+            
+            save_finished(as_completed(list(computing)))
         
+        self.flush_results()
+        if Path(self.db_path) != DB_PATH:
+            merged = merge_into_main(Path(self.db_path), DB_PATH)
+            logger.info(f"Merged {merged} results into {DB_PATH.name}")
         logger.info("Analysis complete")
+    
+    def _error_result(self, park_id: str, message: str) -> Dict:
+        """Result row recording a failed park"""
+        return {
+            'park_id': park_id,
+            'total_area_km2': None,
+            'roaded_area_km2': None,
+            'roadless_area_km2': None,
+            'roadless_percentage': None,
+            'road_length_km': None,
+            'road_density_km_per_km2': None,
+            'buffer_distance_m': self.buffer_m,
+            'road_types_used': ','.join(self.road_types),
+            'roads_json': None,
+            'buffer_roads_json': None,
+            'osm_query_timestamp': datetime.now(timezone.utc).isoformat(),
+            'error_message': message
+        }
+    
+    def _save_computed(self, park: Dict, future, i: int, total: int):
+        """Save the outcome of one park's compute future"""
+        logger.info(f"Progress: {i}/{total}")
+        
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error(f"Failed to analyze {park['id']}: {e}")
+            result = self._error_result(park['id'], str(e))
+        self.save_result(result)
+        self._save_progress(i, total, park['id'])
+        
+        # Force garbage collection
+        gc.collect()
+
+
+# Per-process calculator for ProcessPoolExecutor workers
+_worker: Optional[RoadlessCalculator] = None
+
+def _init_worker(calculator: RoadlessCalculator):
+    global _worker
+    _worker = calculator
+
+def _compute_one(park: Dict, osm_data: Optional[Dict]) -> Dict:
+    return _worker.compute(park, osm_data)
 
 
 def main():
@@ -538,13 +991,20 @@ def main():
     parser.add_argument('--park', type=str, help='Analyze specific park')
     parser.add_argument('--limit', type=int, help='Limit number of parks')
     parser.add_argument('--no-skip', action='store_true', help='Re-analyze already processed parks')
+    parser.add_argument('--include-tracks', action='store_true', help='Count highway=track as roads')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Processes for the geometry work (default: CPU count)')
+    parser.add_argument('--raster-cell', type=float, metavar='M',
+                        help=f'Estimate roaded area on an M-meter grid for parks over {RASTER_MIN_AREA_KM2} km² (needs numba)')
     args = parser.parse_args()
     
-    analyzer = OSMRoadlessAnalyzer()
+    road_types = ROAD_TYPES + ['track'] if args.include_tracks else ROAD_TYPES
+    analyzer = OSMRoadlessAnalyzer(road_types=road_types, raster_cell_m=args.raster_cell)
     analyzer.run_analysis(
         park_id=args.park,
         limit=args.limit,
-        skip_processed=not args.no_skip
+        skip_processed=not args.no_skip,
+        workers=args.workers
     )
 
 